@@ -0,0 +1,68 @@
+"""
+Encode a fixed synthetic frame set under each encoding profile and report encode fps,
+output size and ffmpeg CPU time.
+
+Usage (from the video_buffer directory):
+    python3 -m benchmarks.encoding_profiles --frames 1500 --width 612 --height 512 [--profiles h264 vp9]
+"""
+
+import os
+import cv2
+import time
+import argparse
+import resource
+import tempfile
+import numpy as np
+from common_utils.media.encoding import ENCODING_PROFILES
+from common_utils.media.video_utils import generate_video
+
+
+def synthetic_frames(n_frames, width, height, seed=0):
+    """A static noisy scene with a moving block, roughly what a gate camera sees."""
+    rng = np.random.default_rng(seed)
+    background = cv2.GaussianBlur(rng.integers(0, 255, (height, width, 3), dtype=np.uint8), (9, 9), 0)
+    for i in range(n_frames):
+        frame = background.copy()
+        x = (i * 4) % max(width - 80, 1)
+        cv2.rectangle(frame, (x, height // 3), (x + 80, height // 3 + 60), (40, 40, 200), -1)
+        cv2.putText(frame, str(i), (10, height - 10), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
+        yield frame
+
+
+def children_cpu():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=1500, help="defaults to a 5 minute window at 5 fps")
+    parser.add_argument("--width", type=int, default=612)
+    parser.add_argument("--height", type=int, default=512)
+    parser.add_argument("--framerate", type=int, default=5)
+    parser.add_argument("--profiles", nargs="+", default=list(ENCODING_PROFILES))
+    args = parser.parse_args()
+
+    print(f"{'profile':>18} {'encode fps':>11} {'size MB':>9} {'kbit/s':>9} {'cpu s':>8} {'wall s':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name in args.profiles:
+            path = os.path.join(directory, f"{name}.mp4")
+            cpu, start = children_cpu(), time.perf_counter()
+            metadata = generate_video(
+                frames=synthetic_frames(args.frames, args.width, args.height),
+                framerate=args.framerate,
+                video_path=path,
+                profile=name,
+            )
+            wall, cpu = time.perf_counter() - start, children_cpu() - cpu
+            if metadata is None:
+                print(f"{name:>18} {'failed':>11}")
+                continue
+
+            size = metadata["video_size"]
+            kbits = size * 8 / 1000 / (args.frames / args.framerate)
+            print(f"{name:>18} {args.frames / wall:>11.1f} {size / 1e6:>9.2f} {kbits:>9.0f} {cpu:>8.1f} {wall:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Frames/s of the raw frame write path into ffmpeg: the former BGR->RGB + PIL round trip
+against the zero-copy bgr24 path.
+
+Usage (from the video_buffer directory):
+    python3 -m benchmarks.raw_frame_writes --frames 500 --width 612 --height 512 [--ffmpeg]
+
+Without --ffmpeg frames are written to /dev/null, which isolates the per-frame
+preparation cost. With --ffmpeg they are piped into an ffmpeg process that
+decodes the raw input and discards it.
+"""
+
+import os
+import cv2
+import time
+import argparse
+import subprocess
+import numpy as np
+from PIL import Image
+from common_utils.media.video_utils import prepare_frame
+
+
+def pil_rgb_bytes(frame, size):
+    frame = cv2.resize(frame, size, interpolation=cv2.INTER_NEAREST)
+    return Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)).tobytes()
+
+
+def open_sink(use_ffmpeg, pix_fmt, width, height):
+    if not use_ffmpeg:
+        return None, open(os.devnull, "wb")
+
+    process = subprocess.Popen(
+        [
+            "ffmpeg", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", pix_fmt,
+            "-s", f"{width}x{height}", "-i", "-", "-f", "null", "-",
+        ],
+        stdin=subprocess.PIPE,
+    )
+    return process, process.stdin
+
+
+def bench(name, prepare, pix_fmt, frames, size, use_ffmpeg):
+    process, sink = open_sink(use_ffmpeg, pix_fmt, *size)
+    start = time.perf_counter()
+    for frame in frames:
+        sink.write(prepare(frame, size))
+    sink.close()
+    if process is not None:
+        process.wait()
+    elapsed = time.perf_counter() - start
+    print(f"{name:>16} {len(frames) / elapsed:>10.1f} frames/s")
+    return len(frames) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=500)
+    parser.add_argument("--width", type=int, default=612)
+    parser.add_argument("--height", type=int, default=512)
+    parser.add_argument("--ffmpeg", action="store_true", help="pipe into ffmpeg instead of /dev/null")
+    args = parser.parse_args()
+
+    pool = [np.random.randint(0, 255, (args.height, args.width, 3), dtype=np.uint8) for _ in range(10)]
+    frames = [pool[i % len(pool)] for i in range(args.frames)]
+    size = (args.width, args.height)
+
+    legacy = bench("pil rgb24", pil_rgb_bytes, "rgb24", frames, size, args.ffmpeg)
+    zero_copy = bench("memoryview bgr24", prepare_frame, "bgr24", frames, size, args.ffmpeg)
+    print(f"{'speedup':>16} {zero_copy / legacy:>10.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Decode time per frame of a full JPEG decode followed by a resize to the video width,
+against a reduced-size decode (IMREAD_REDUCED_COLOR_2/4/8) picked for that width.
+
+Usage (from the video_buffer directory):
+    python3 -m benchmarks.reduced_decode --frames 50 --target-width 640
+
+Frames are synthetic JPEGs written to a temporary directory, one set per camera
+resolution, and read back with cv2.imread as the frame loader does.
+"""
+
+import os
+import cv2
+import time
+import argparse
+import tempfile
+import numpy as np
+from common_utils.media.image_codec import jpeg_size, reduction_factor, read_image
+
+RESOLUTIONS = [(640, 480), (1280, 720), (1920, 1080), (2448, 2048), (3840, 2160)]
+
+
+def synthetic_jpeg(path, width, height):
+    # smooth content with some noise compresses like a camera frame, unlike pure noise
+    small = np.random.randint(0, 255, (height // 16, width // 16, 3), dtype=np.uint8)
+    frame = cv2.resize(small, (width, height), interpolation=cv2.INTER_LINEAR)
+    frame = cv2.add(frame, np.random.randint(0, 20, frame.shape, dtype=np.uint8))
+    cv2.imwrite(path, frame, [cv2.IMWRITE_JPEG_QUALITY, 90])
+
+
+def bench(paths, read):
+    start = time.perf_counter()
+    for path in paths:
+        read(path)
+    return (time.perf_counter() - start) / len(paths) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--target-width", type=int, default=640)
+    args = parser.parse_args()
+
+    print(f"{'resolution':>12} {'factor':>7} {'full+resize':>12} {'reduced':>10} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for width, height in RESOLUTIONS:
+            paths = []
+            for i in range(args.frames):
+                path = os.path.join(directory, f"{width}x{height}_{i}.jpg")
+                synthetic_jpeg(path, width, height)
+                paths.append(path)
+
+            target = (args.target_width, int(height * args.target_width / width) // 2 * 2)
+            factor = reduction_factor(jpeg_size(paths[0])[0], args.target_width)
+
+            def full(path):
+                return cv2.resize(cv2.imread(path), target, interpolation=cv2.INTER_NEAREST)
+
+            def reduced(path):
+                frame = read_image(path, factor)
+                if frame.shape[1] != target[0]:
+                    frame = cv2.resize(frame, target, interpolation=cv2.INTER_NEAREST)
+                return frame
+
+            full_ms, reduced_ms = bench(paths, full), bench(paths, reduced)
+            print(
+                f"{f'{width}x{height}':>12} {f'1/{factor}':>7} {full_ms:>10.2f}ms {reduced_ms:>8.2f}ms"
+                f" {full_ms / reduced_ms:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Peak RSS of the video generation pipeline, streaming vs. materialising all frames in a list.
+
+Usage (from the video_buffer directory):
+    python3 -m benchmarks.streaming_rss --frames 1000 5000 20000
+"""
+
+import os
+import cv2
+import time
+import argparse
+import resource
+import tempfile
+import numpy as np
+import multiprocessing
+from types import SimpleNamespace
+from datetime import datetime, timedelta, timezone
+from common_utils.media.frame_loader import iter_frames
+from common_utils.media.video_utils import generate_video
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def make_images(directory, n_frames, width, height, pool_size=50):
+    """Write a small pool of JPEGs and return n_frames image records cycling through them."""
+    paths = []
+    for i in range(pool_size):
+        frame = np.random.randint(0, 255, (height, width, 3), dtype=np.uint8)
+        path = os.path.join(directory, f"{i}.jpg")
+        cv2.imwrite(path, frame)
+        paths.append(path)
+
+    start = datetime.now(tz=timezone.utc)
+    return [
+        SimpleNamespace(
+            image_id=f"bench-{i}",
+            source=None,
+            timestamp=start + timedelta(seconds=i),
+            image_file=SimpleNamespace(path=paths[i % pool_size]),
+        )
+        for i in range(n_frames)
+    ]
+
+
+def run(mode, n_frames, width, height, queue):
+    with tempfile.TemporaryDirectory() as directory:
+        images = make_images(directory, n_frames, width, height)
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        start = time.perf_counter()
+        frames = iter_frames(images, legend_text=lambda image: image.timestamp.strftime(DATETIME_FORMAT))
+        if mode == "list":
+            frames = list(frames)
+
+        generate_video(frames=frames, framerate=5, video_path=os.path.join(directory, "bench.mp4"))
+        elapsed = time.perf_counter() - start
+
+        # ru_maxrss is in KB on Linux
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        queue.put((peak, peak - baseline, elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--width", type=int, default=612)
+    parser.add_argument("--height", type=int, default=512)
+    parser.add_argument("--list-max", type=int, default=5000, help="skip the list baseline above this many frames")
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    print(f"{'frames':>8} {'mode':>8} {'peak RSS MB':>12} {'pipeline MB':>12} {'seconds':>9}")
+    for n_frames in args.frames:
+        for mode in ("stream", "list"):
+            if mode == "list" and n_frames > args.list_max:
+                print(f"{n_frames:>8} {mode:>8} {'skipped':>12}")
+                continue
+
+            # one process per run, ru_maxrss only ever grows
+            queue = ctx.Queue()
+            process = ctx.Process(target=run, args=(mode, n_frames, args.width, args.height, queue))
+            process.start()
+            peak, delta, elapsed = queue.get()
+            process.join()
+            print(f"{n_frames:>8} {mode:>8} {peak / 1024:>12.1f} {delta / 1024:>12.1f} {elapsed:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
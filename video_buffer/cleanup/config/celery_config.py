@@ -41,6 +41,13 @@ class BaseConfig:
                 'queue': f'{os.getenv("CLEANUP_QUEUE_NAME", "celery")}'
             },
         },
+        'enforce-retention': {
+            'task': 'cleanup.tasks.cleanup.core.enforce_retention',
+            'schedule': crontab('*/1'),
+            'options': {
+                'queue': f'{os.getenv("CLEANUP_QUEUE_NAME", "celery")}'
+            },
+        },
     }
 
 class DevelopmentConfig(BaseConfig):
@@ -0,0 +1,19 @@
+import os
+
+# time based retention, applied when images and videos are created
+IMAGE_RETENTION_MINUTES = int(os.getenv("IMAGE_RETENTION_MINUTES", "15"))
+VIDEO_RETENTION_HOURS = int(os.getenv("VIDEO_RETENTION_HOURS", "14"))
+
+# size based retention of /media, oldest images and videos are evicted once the
+# high watermark is crossed, until usage is back under the low watermark
+MEDIA_QUOTA_GB = float(os.getenv("MEDIA_QUOTA_GB", "0"))  # 0 for the size of the volume, usage is always what the database tracks
+RETENTION_HIGH_WATERMARK = float(os.getenv("RETENTION_HIGH_WATERMARK", "0.9"))
+RETENTION_LOW_WATERMARK = float(os.getenv("RETENTION_LOW_WATERMARK", "0.8"))
+RETENTION_CHUNK_SIZE = int(os.getenv("RETENTION_CHUNK_SIZE", "500"))
+RETENTION_LOCK_FILE = os.getenv("RETENTION_LOCK_FILE", "/tmp/video_buffer_retention.lock")
+
+# ingest triggers a retention check every RETENTION_TRIGGER_MB written, at most every RETENTION_TRIGGER_SECONDS
+RETENTION_TRIGGER_MB = float(os.getenv("RETENTION_TRIGGER_MB", "256"))
+RETENTION_TRIGGER_SECONDS = float(os.getenv("RETENTION_TRIGGER_SECONDS", "30"))
+RETENTION_TASK = 'cleanup.tasks.cleanup.core.enforce_retention'
+CLEANUP_QUEUE_NAME = os.getenv("CLEANUP_QUEUE_NAME", "celery")
@@ -0,0 +1,174 @@
+import django
+django.setup()
+
+import os
+import time
+import fcntl
+import shutil
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db.models import Sum
+from database.models import Image, Video
+from common_utils.models.cleanup import unlink, unlink_video, CLEANUP_WORKERS
+from cleanup.config.retention_config import (
+    MEDIA_QUOTA_GB, RETENTION_HIGH_WATERMARK, RETENTION_LOW_WATERMARK, RETENTION_CHUNK_SIZE,
+    RETENTION_TRIGGER_MB, RETENTION_TRIGGER_SECONDS, RETENTION_TASK, CLEANUP_QUEUE_NAME, RETENTION_LOCK_FILE,
+)
+
+
+def quota_usage():
+    """
+    Usage to compare against the watermarks.
+
+    The bytes of the images and videos tracked in the database, against MEDIA_QUOTA_GB
+    or, without it, the size of the media volume. Only what the buffer itself wrote
+    counts, other data on a shared mount never makes it evict media.
+
+    Returns:
+        (used, quota) in bytes.
+    """
+    if MEDIA_QUOTA_GB > 0:
+        return sum(media_usage()), int(MEDIA_QUOTA_GB * 1024 ** 3)
+
+    return sum(media_usage()), shutil.disk_usage(settings.MEDIA_ROOT).total
+
+
+def media_usage():
+    """
+    Returns:
+        The bytes used by images and by videos, from their image_size, and video_size plus hls_size.
+    """
+    images = Image.objects.aggregate(total=Sum("image_size"))["total"] or 0
+    videos = Video.objects.aggregate(mp4=Sum("video_size"), hls=Sum("hls_size"))
+    return images, (videos["mp4"] or 0) + (videos["hls"] or 0)
+
+
+def _oldest(model, time_field:str):
+    return model.objects.order_by(time_field).values_list(time_field, flat=True).first()
+
+
+def evict_chunk(model, time_field:str, file_field:str, size_fields:Tuple[str, ...], chunk_size:int,
+                executor:ThreadPoolExecutor, remove=unlink):
+    """
+    Delete the chunk_size oldest rows of a model and their files.
+
+    Returns:
+        The number of rows deleted and the bytes they accounted for.
+    """
+    chunk = list(model.objects.order_by(time_field).values_list("id", file_field, *size_fields)[:chunk_size])
+    paths = [os.path.join(settings.MEDIA_ROOT, row[1]) for row in chunk if row[1]]
+    freed = sum(executor.map(remove, paths))
+    deleted, _ = model.objects.filter(id__in=[row[0] for row in chunk]).delete()
+    # rows without a recorded size count for what was actually unlinked
+    return deleted, max(sum(size or 0 for row in chunk for size in row[2:]), freed)
+
+
+@contextmanager
+def retention_lock(path:str=RETENTION_LOCK_FILE):
+    """
+    Non blocking exclusive lock shared by every process of the container, so that
+    the beat run and the runs requested by RetentionTrigger never evict at the same time.
+
+    Yields:
+        True if the lock was acquired, False if another run holds it.
+    """
+    with open(path, "a") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def enforce_retention(chunk_size:int=RETENTION_CHUNK_SIZE, workers:int=CLEANUP_WORKERS, time_budget:float=60):
+    """
+    Evict the oldest images and videos, whichever is older first, once usage (see
+    quota_usage) crosses RETENTION_HIGH_WATERMARK of the quota, until it is back
+    under RETENTION_LOW_WATERMARK. Usage is measured again after every chunk, and
+    the run is skipped while another one holds retention_lock.
+
+    Returns:
+        A dict with the quota, the usage before, the rows evicted and the bytes freed.
+    """
+    with retention_lock() as acquired:
+        if not acquired:
+            logging.info("Retention already running, skipping")
+            return {"quota": 0, "used": 0, "images": 0, "videos": 0, "bytes": 0}
+
+        return _enforce_retention(chunk_size, workers, time_budget)
+
+
+def _enforce_retention(chunk_size:int, workers:int, time_budget:float):
+    used, quota = quota_usage()
+    results = {"quota": quota, "used": used, "images": 0, "videos": 0, "bytes": 0}
+    if used < RETENTION_HIGH_WATERMARK * quota:
+        return results
+
+    logging.warning(f"Media usage {used / 1024 ** 3:.2f} GB above {RETENTION_HIGH_WATERMARK:.0%} of {quota / 1024 ** 3:.2f} GB, evicting")
+    deadline = time.monotonic() + time_budget
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        while used > RETENTION_LOW_WATERMARK * quota and time.monotonic() < deadline:
+            oldest_image, oldest_video = _oldest(Image, "timestamp"), _oldest(Video, "created_at")
+            if oldest_image is None and oldest_video is None:
+                break
+
+            if oldest_video is None or (oldest_image is not None and oldest_image <= oldest_video):
+                deleted, freed = evict_chunk(Image, "timestamp", "image_file", ("image_size",), chunk_size, executor)
+                results["images"] += deleted
+            else:
+                deleted, freed = evict_chunk(Video, "created_at", "video_file", ("video_size", "hls_size"), 1, executor, unlink_video)
+                results["videos"] += deleted
+            results["bytes"] += freed
+            if not freed:
+                # nothing left that counts toward the usage, evicting more would not help
+                break
+
+            used, quota = quota_usage()
+
+    return results
+
+
+class RetentionTrigger:
+    """
+    Requests a retention check from the cleanup worker once enough bytes have been
+    ingested, so that a burst does not have to wait for the beat schedule.
+
+    Attributes:
+        threshold: Bytes ingested between two checks.
+        interval: Minimum seconds between two checks.
+    """
+    def __init__(self, threshold_mb:float=RETENTION_TRIGGER_MB, interval:float=RETENTION_TRIGGER_SECONDS):
+        self.threshold = threshold_mb * 1024 ** 2
+        self.interval = interval
+        self.ingested = 0
+        self.last = 0.
+        self.lock = threading.Lock()
+        self.app = None
+
+    def add(self, size:int):
+        with self.lock:
+            self.ingested += size
+            if self.threshold <= 0 or self.ingested < self.threshold or time.monotonic() - self.last < self.interval:
+                return
+            self.ingested, self.last = 0, time.monotonic()
+
+        try:
+            if self.app is None:
+                from celery import Celery
+                from cleanup.config.celery_config import BaseConfig
+                self.app = Celery(broker=BaseConfig.CELERY_BROKER_URL)
+            self.app.send_task(RETENTION_TASK, queue=CLEANUP_QUEUE_NAME)
+        except Exception as err:
+            logging.error(f"Error requesting a retention check: {err}")
+
+
+retention_trigger = RetentionTrigger()
@@ -11,13 +11,32 @@ import numpy as np
 from celery import Celery
 from celery import shared_task
 from django.core.management import call_command
+from common_utils.models.cleanup import CLEANUP_MODE
+from cleanup import retention
+from generate_video.rolling.segments import prune_segments, VIDEO_SEGMENT_RETENTION_MINUTES
 from datetime import datetime, timedelta, timezone
 
 @shared_task(bind=True,autoretry_for=(Exception,), retry_backoff=True, retry_kwargs={"max_retries": 5}, ignore_result=True,
              name='cleanup.tasks.cleanup.core.cleanup_expired_files')
 def cleanup_expired_files(self, **kwargs):
     try:
-        call_command("cleanup_expired_files")
+        # buckets: drop whole expired image directories, rows: delete row by row
+        call_command("cleanup_expired_files", mode=kwargs.get("mode", CLEANUP_MODE))
+        # rolling mode segments, concatenated into videos within minutes and no longer needed after
+        prune_segments(before=datetime.now(tz=timezone.utc) - timedelta(minutes=VIDEO_SEGMENT_RETENTION_MINUTES))
         
     except Exception as err:
-        raise ValueError(f"Error cleaning up expired files: {err}")
\ No newline at end of file
+        raise ValueError(f"Error cleaning up expired files: {err}")
+
+@shared_task(bind=True, ignore_result=True, name='cleanup.tasks.cleanup.core.enforce_retention')
+def enforce_retention(self, **kwargs):
+    try:
+        results = retention.enforce_retention()
+        if results["images"] or results["videos"]:
+            logging.warning(
+                f"Evicted {results['images']} images and {results['videos']} videos, "
+                f"{results['bytes'] / 1024 ** 2:.1f} MB freed"
+            )
+        
+    except Exception as err:
+        raise ValueError(f"Error enforcing retention: {err}")
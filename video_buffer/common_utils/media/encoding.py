@@ -0,0 +1,108 @@
+import os
+import logging
+from typing import Dict, Optional
+
+VIDEO_ENCODING_PROFILE = os.getenv("VIDEO_ENCODING_PROFILE", "h264")
+
+# crf and bitrate are exclusive, a profile with a crf is constant quality
+ENCODING_PROFILES = {
+    # the settings used before profiles existed
+    "h264-7000k": {
+        "codec": "libx264",
+        "bitrate": "7000k",
+    },
+    "h264": {
+        "codec": "libx264",
+        "preset": "veryfast",
+        "crf": 28,
+    },
+    "h264-zerolatency": {
+        "codec": "libx264",
+        "preset": "ultrafast",
+        "tune": "zerolatency",
+        "crf": 28,
+    },
+    "h265": {
+        "codec": "libx265",
+        "preset": "fast",
+        "crf": 30,
+        "extra": ["-tag:v", "hvc1"],  # playable in Safari
+    },
+    "vp9": {
+        "codec": "libvpx-vp9",
+        "crf": 38,
+        "extra": ["-deadline", "realtime", "-cpu-used", "8", "-row-mt", "1"],
+    },
+}
+
+# per-setting overrides of the selected profile
+PROFILE_OVERRIDES = {
+    "preset": "VIDEO_ENCODING_PRESET",
+    "crf": "VIDEO_ENCODING_CRF",
+    "bitrate": "VIDEO_ENCODING_BITRATE",
+    "threads": "VIDEO_ENCODING_THREADS",
+    "tune": "VIDEO_ENCODING_TUNE",
+}
+
+
+def get_profile(name:Optional[str]=None):
+    """
+    Resolve an encoding profile.
+
+    Parameters:
+        name: Name of a profile in ENCODING_PROFILES. Defaults to VIDEO_ENCODING_PROFILE.
+
+    Returns:
+        The profile settings, with the VIDEO_ENCODING_* environment overrides applied.
+    """
+    name = name or VIDEO_ENCODING_PROFILE
+    if name not in ENCODING_PROFILES:
+        raise ValueError(f"encoding profile {name} not supported, expected one of {list(ENCODING_PROFILES)}")
+
+    profile: Dict = dict(ENCODING_PROFILES[name], name=name)
+    for key, env in PROFILE_OVERRIDES.items():
+        value = os.getenv(env)
+        if value:
+            profile[key] = value
+
+    # an explicit bitrate switches a constant quality profile to a target bitrate
+    if os.getenv("VIDEO_ENCODING_BITRATE") and not os.getenv("VIDEO_ENCODING_CRF"):
+        profile.pop("crf", None)
+
+    return profile
+
+
+def encoder_args(profile:Optional[Dict]=None):
+    """
+    Build the ffmpeg output arguments selecting and configuring the encoder.
+
+    Parameters:
+        profile: Profile settings as returned by get_profile. Defaults to the configured profile.
+
+    Returns:
+        The list of ffmpeg arguments.
+    """
+    profile = profile or get_profile()
+    args = [
+        '-vcodec', profile["codec"],
+        '-pix_fmt', 'yuv420p',  # Pixel format for compatibility
+    ]
+
+    if profile.get("preset"):
+        args += ['-preset', str(profile["preset"])]
+    if profile.get("tune"):
+        args += ['-tune', str(profile["tune"])]
+
+    if profile.get("crf") is not None:
+        args += ['-crf', str(profile["crf"])]
+        if profile["codec"] == "libvpx-vp9":
+            args += ['-b:v', '0']  # constant quality mode of libvpx
+    elif profile.get("bitrate"):
+        args += ['-b:v', str(profile["bitrate"])]
+    else:
+        logging.warning(f"encoding profile {profile.get('name')} sets neither crf nor bitrate, using encoder defaults")
+
+    if profile.get("threads"):
+        args += ['-threads', str(profile["threads"])]
+
+    return args + list(profile.get("extra", []))
@@ -0,0 +1,279 @@
+import os
+import struct
+import hashlib
+import logging
+import threading
+import numpy as np
+from datetime import datetime
+from typing import Optional, Dict, List, Tuple
+from multiprocessing import shared_memory, resource_tracker
+
+FRAME_BUFFER_ENABLED = os.getenv("FRAME_BUFFER_ENABLED", "1").lower() in ("1", "true", "yes")
+# total budget of the buffers, split evenly between the FRAME_BUFFER_TOPICS topics of the node,
+# the shm_size of the container must hold it (see docker-compose.yml)
+FRAME_BUFFER_SIZE_MB = int(os.getenv("FRAME_BUFFER_SIZE_MB", "256"))
+FRAME_BUFFER_TOPICS = int(os.getenv(
+    "FRAME_BUFFER_TOPICS", str(len([topic for topic in os.getenv("ROS_TOPICS", "").split(",") if topic.strip()]) or 1)
+))
+FRAME_BUFFER_TOPIC_MB = FRAME_BUFFER_SIZE_MB / max(FRAME_BUFFER_TOPICS, 1)
+FRAME_BUFFER_SHM_DIR = "/dev/shm"
+
+MAGIC = b"VBFRAME1"
+HEADER = struct.Struct("<8sQQQ")          # magic, n_slots, slot_bytes, write_seq
+HEADER_SIZE = 64
+SLOT_HEADER = struct.Struct("<QdIII64s")  # seq, timestamp, height, width, channels, img_key
+SLOT_HEADER_SIZE = 128
+WRITE_SEQ_OFFSET = 8 + 8 + 8
+KEY_SIZE = 64
+
+
+def segment_name(set_name:str):
+    """Shared memory segment name for a camera topic."""
+    return "video_buffer_" + hashlib.sha1(set_name.encode("utf-8")).hexdigest()[:16]
+
+
+def _attach(name:str):
+    """Attach to an existing segment without handing it to the resource tracker.
+
+    Before Python 3.13 every attached segment is registered with the resource
+    tracker, which unlinks it when the reading process exits and takes the
+    buffer away from the writer.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        except Exception:
+            pass
+        return shm
+
+
+class FrameRingBuffer:
+    """
+    A bounded, time-indexed ring of raw frames for one camera topic held in shared memory.
+
+    The segment is split into fixed-size slots. The writer overwrites the oldest slot
+    once the byte budget is used up, so eviction is strictly oldest-first. Each slot
+    carries a sequence number that is cleared while the slot is being written; readers
+    check it before and after copying a frame and drop the frame if it changed.
+
+    Attributes:
+        set_name: The camera topic the buffer belongs to.
+        n_slots: Number of frames the buffer can hold.
+        slot_bytes: Maximum size in bytes of a single frame.
+    """
+    def __init__(self, set_name:str, shm:shared_memory.SharedMemory, owner:bool=False):
+        self.set_name = set_name
+        self.shm = shm
+        self.owner = owner
+        magic, self.n_slots, self.slot_bytes, _ = HEADER.unpack_from(self.shm.buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"shared memory segment {shm.name} is not a frame buffer")
+        self.stride = SLOT_HEADER_SIZE + self.slot_bytes
+        self._index = None
+        # writes are a read-modify-write of write_seq, one writer thread at a time
+        self.lock = threading.Lock()
+
+    @classmethod
+    def create(cls, set_name:str, frame:np.ndarray, size_mb:float=FRAME_BUFFER_TOPIC_MB):
+        """
+        Create the buffer for a topic, sizing slots after the first frame.
+
+        Parameters:
+            set_name: The camera topic.
+            frame: A representative frame, used to size the slots.
+            size_mb: Byte budget of the buffer, in MB, its share of FRAME_BUFFER_SIZE_MB by default.
+                Capped by the free space in /dev/shm.
+
+        Returns:
+            The writable FrameRingBuffer.
+        """
+        budget = int(size_mb * 1024 * 1024)
+        if os.path.isdir(FRAME_BUFFER_SHM_DIR):
+            stat = os.statvfs(FRAME_BUFFER_SHM_DIR)
+            available = int(stat.f_bavail * stat.f_frsize * 0.9)
+            if available < budget:
+                logging.warning(
+                    f"Frame buffer for {set_name} capped to {available / 1024 ** 2:.1f} MB of {size_mb:.1f} MB, "
+                    f"{FRAME_BUFFER_SHM_DIR} is too small for FRAME_BUFFER_SIZE_MB"
+                )
+                budget = available
+
+        slot_bytes = frame.nbytes
+        n_slots = (budget - HEADER_SIZE) // (SLOT_HEADER_SIZE + slot_bytes)
+        if n_slots < 2:
+            raise ValueError(f"frame buffer budget of {budget} bytes is too small for frames of {slot_bytes} bytes")
+
+        name = segment_name(set_name)
+        size = HEADER_SIZE + n_slots * (SLOT_HEADER_SIZE + slot_bytes)
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # left behind by a previous run of the writer
+            stale = _attach(name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        shm.buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+        HEADER.pack_into(shm.buf, 0, MAGIC, n_slots, slot_bytes, 0)
+        logging.info(f"Created frame buffer for {set_name}: {n_slots} slots of {slot_bytes} bytes, {size / 1024 ** 2:.1f} MB")
+        return cls(set_name, shm, owner=True)
+
+    @classmethod
+    def attach(cls, set_name:str):
+        """
+        Attach to the buffer of a topic for reading.
+
+        Returns:
+            The FrameRingBuffer, or None if no writer has created it.
+        """
+        try:
+            return cls(set_name, _attach(segment_name(set_name)))
+        except FileNotFoundError:
+            return None
+
+    def _offset(self, slot:int):
+        return HEADER_SIZE + slot * self.stride
+
+    @property
+    def write_seq(self):
+        return struct.unpack_from("<Q", self.shm.buf, WRITE_SEQ_OFFSET)[0]
+
+    def put(self, frame:np.ndarray, img_key:str, timestamp:datetime):
+        """
+        Store a frame, evicting the oldest one once the buffer is full.
+
+        Returns:
+            True if the frame was stored, False if it does not fit in a slot.
+        """
+        key = img_key.encode("utf-8")
+        if frame.dtype != np.uint8 or frame.nbytes > self.slot_bytes or len(key) > KEY_SIZE:
+            return False
+
+        h, w = frame.shape[:2]
+        c = frame.shape[2] if frame.ndim == 3 else 1
+        with self.lock:
+            seq = self.write_seq
+            offset = self._offset(seq % self.n_slots)
+
+            struct.pack_into("<Q", self.shm.buf, offset, 0)
+            data = np.ndarray(frame.shape, dtype=np.uint8, buffer=self.shm.buf, offset=offset + SLOT_HEADER_SIZE)
+            data[...] = frame
+            SLOT_HEADER.pack_into(self.shm.buf, offset, seq + 1, timestamp.timestamp(), h, w, c, key)
+            struct.pack_into("<Q", self.shm.buf, WRITE_SEQ_OFFSET, seq + 1)
+        return True
+
+    def refresh(self):
+        """
+        Rebuild the img_key index from the slot headers.
+
+        Returns:
+            A dict mapping img_key to (slot, seq, timestamp).
+        """
+        index = {}
+        for slot in range(self.n_slots):
+            seq, timestamp, _, _, _, key = SLOT_HEADER.unpack_from(self.shm.buf, self._offset(slot))
+            if seq:
+                index[key.rstrip(b"\x00").decode("utf-8")] = (slot, seq, timestamp)
+        self._index = index
+        return index
+
+    def _read(self, slot:int, seq:int):
+        offset = self._offset(slot)
+        current, _, h, w, c, _ = SLOT_HEADER.unpack_from(self.shm.buf, offset)
+        if current != seq:
+            return None
+
+        shape = (h, w, c) if c > 1 else (h, w)
+        frame = np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf, offset=offset + SLOT_HEADER_SIZE).copy()
+        if struct.unpack_from("<Q", self.shm.buf, offset)[0] != seq:
+            # overwritten by the writer while copying
+            return None
+
+        return frame
+
+    def get(self, img_key:str):
+        """
+        Read a frame by its img_key.
+
+        The index is built on first use; call refresh() to pick up frames written since.
+
+        Returns:
+            A copy of the frame, or None if it was never buffered or has been evicted.
+        """
+        if self._index is None:
+            self.refresh()
+
+        entry = self._index.get(img_key)
+        if entry is None:
+            return None
+
+        slot, seq, _ = entry
+        return self._read(slot, seq)
+
+    def between(self, from_time:datetime, to_time:datetime):
+        """
+        Yield (timestamp, img_key, frame) for the buffered frames in [from_time, to_time), oldest first.
+        """
+        start, end = from_time.timestamp(), to_time.timestamp()
+        entries: List[Tuple[float, str, int, int]] = sorted(
+            (timestamp, key, slot, seq) for key, (slot, seq, timestamp) in self.refresh().items()
+            if start <= timestamp < end
+        )
+        for timestamp, key, slot, seq in entries:
+            frame = self._read(slot, seq)
+            if frame is not None:
+                yield timestamp, key, frame
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+_writers: Dict[str, Optional[FrameRingBuffer]] = {}
+_writers_lock = threading.Lock()
+
+
+def put_frame(set_name:str, frame:np.ndarray, img_key:str, timestamp:datetime):
+    """
+    Store a frame in the ring buffer of its topic, creating the buffer on the first frame.
+    """
+    if not FRAME_BUFFER_ENABLED:
+        return False
+
+    try:
+        if set_name not in _writers:
+            with _writers_lock:
+                # two first frames of a topic must not both create, and unlink, its segment
+                if set_name not in _writers:
+                    _writers[set_name] = FrameRingBuffer.create(set_name, frame)
+
+        buffer = _writers[set_name]
+        return buffer.put(frame, img_key, timestamp) if buffer is not None else False
+
+    except Exception as err:
+        # disable the buffer for this topic, frames are still read back from disk
+        _writers[set_name] = None
+        logging.error(f"Error buffering frame for {set_name}: {err}")
+        return False
+
+
+def open_reader(set_name:Optional[str]):
+    """
+    Attach to the ring buffer of a topic for reading.
+
+    Returns:
+        The FrameRingBuffer, or None if buffering is disabled or the buffer does not exist.
+    """
+    if not FRAME_BUFFER_ENABLED or not set_name:
+        return None
+
+    try:
+        return FrameRingBuffer.attach(set_name)
+    except Exception as err:
+        logging.error(f"Error attaching to frame buffer for {set_name}: {err}")
+        return None
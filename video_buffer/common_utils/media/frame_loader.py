@@ -0,0 +1,133 @@
+import os
+import cv2
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Optional
+from common_utils.annotate.core import Annotator
+from common_utils.media.frame_buffer import open_reader
+from common_utils.media.image_codec import (
+    INGEST_PASSTHROUGH, INGEST_DOWNSCALE, read_image, jpeg_size, reduction_factor
+)
+from common_utils.media.parallel import imap_ordered, VIDEO_WORKERS
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+# width of the generated videos, images on disk are decoded at the smallest JPEG scale not below it
+VIDEO_TARGET_WIDTH = int(os.getenv("VIDEO_TARGET_WIDTH", "0"))
+
+
+class FrameLoader:
+    """
+    Loads the frames of buffered images, from the shared memory ring buffer when
+    the frame is still there and from disk otherwise.
+
+    Images read from disk are downscaled while decoding: to the smallest JPEG
+    scale (1/2, 1/4 or 1/8) that is still at least target_width wide, or, without
+    a target width, like the buffered frames for images stored in passthrough mode.
+
+    Attributes:
+        readers: Ring buffer readers, one per image source.
+        target_width: Width the frames are encoded at, 0 to decode at full size.
+        factors: Decode downscale factor per image source, a camera keeps its resolution.
+    """
+    def __init__(self, target_width:int=VIDEO_TARGET_WIDTH):
+        self.readers = {}
+        self.target_width = target_width
+        self.factors = {}
+        self._lock = threading.Lock()
+
+    def read(self, image):
+        """
+        Read the frame of an image.
+
+        Parameters:
+            image: An object with image_id, source and image_file attributes (e.g. database.models.Image),
+                image_file being a file field or the path of the file.
+
+        Returns:
+            The frame as a BGR NumPy array, or None if it could not be read.
+        """
+        if image.source not in self.readers:
+            with self._lock:
+                if image.source not in self.readers:
+                    self.readers[image.source] = open_reader(image.source)
+
+        # read from the shared memory ring buffer, fall back to disk for evicted frames
+        reader = self.readers[image.source]
+        frame = reader.get(image.image_id) if reader is not None else None
+        if frame is None:
+            path = image.image_file if isinstance(image.image_file, str) else image.image_file.path
+            if image.source not in self.factors:
+                self.factors[image.source] = self.decode_factor(path)
+            frame = read_image(path, self.factors[image.source])
+
+        return frame
+
+    def decode_factor(self, path:str):
+        if not self.target_width:
+            # passthrough images are stored at camera resolution, downscale them like the buffered frames
+            return INGEST_DOWNSCALE if INGEST_PASSTHROUGH else 1
+
+        size = jpeg_size(path)
+        return reduction_factor(size[0], self.target_width) if size is not None else 1
+
+    def close(self):
+        for reader in self.readers.values():
+            if reader is not None:
+                reader.close()
+        self.readers = {}
+
+
+def timestamp_legend(timestamp:datetime):
+    """Legend drawn on every frame, the capture time in local time."""
+    return (timestamp + timedelta(hours=2)).strftime(DATETIME_FORMAT)
+
+
+def annotate_frame(frame, legend_text:str):
+    annotator = Annotator(
+            im=frame
+        )
+    annotator.add_legend(
+            legend_text=legend_text, font=1, font_scale=1.5, font_thickness=1,
+        )
+    return annotator.im.data
+
+
+def iter_frames(images:Iterable, legend_text:Optional[Callable]=None, workers:int=VIDEO_WORKERS, queue_size:Optional[int]=None,
+                target_width:int=VIDEO_TARGET_WIDTH):
+    """
+    Lazily read and annotate the frames of a sequence of images.
+
+    Frames are decoded and annotated on a pool of worker threads and handed out
+    in order through a bounded queue, so the caller only ever holds a small
+    window of frames rather than every frame of the video.
+
+    Parameters:
+        images: Iterable of images, see FrameLoader.read.
+        legend_text: Optional callable mapping an image to the legend drawn on its frame.
+        workers: Number of decode/annotate threads.
+        queue_size: Bound on frames decoded ahead of the consumer. Defaults to twice the number of workers.
+        target_width: Width the frames will be encoded at, see FrameLoader.
+
+    Yields:
+        The annotated frames, in the order of images. Unreadable images are skipped.
+    """
+    loader = FrameLoader(target_width=target_width)
+
+    def render(image):
+        frame = loader.read(image)
+        if frame is None:
+            logging.error(f"Error reading frame of image {image.image_id}")
+            return None
+
+        if legend_text is not None:
+            frame = annotate_frame(frame, legend_text(image))
+
+        return frame
+
+    try:
+        for frame in imap_ordered(render, images, workers=workers, queue_size=queue_size):
+            if frame is not None:
+                yield frame
+    finally:
+        loader.close()
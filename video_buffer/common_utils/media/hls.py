@@ -0,0 +1,93 @@
+import os
+import shutil
+import logging
+import subprocess
+
+# also write every generated video as an HLS rendition, served by the data API next to the MP4
+VIDEO_HLS = os.getenv("VIDEO_HLS", "0").lower() in ("1", "true", "yes")
+VIDEO_HLS_SEGMENT_SECONDS = int(os.getenv("VIDEO_HLS_SEGMENT_SECONDS", "4"))
+VIDEO_HLS_SEGMENT_TYPE = os.getenv("VIDEO_HLS_SEGMENT_TYPE", "fmp4")  # fmp4 | mpegts
+
+HLS_PLAYLIST = "index.m3u8"
+HLS_INIT = "init.mp4"
+SEGMENT_EXTENSIONS = {"fmp4": "m4s", "mpegts": "ts"}
+
+HLS_MEDIA_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".m4s": "video/iso.segment",
+    ".ts": "video/mp2t",
+    ".mp4": "video/mp4",
+}
+
+
+def hls_dir(video_path:str):
+    """Directory of the HLS rendition of a video, next to it: videos/<name>.mp4 -> videos/<name>.hls"""
+    return f"{os.path.splitext(video_path)[0]}.hls"
+
+
+def keyframe_args(seconds:int=VIDEO_HLS_SEGMENT_SECONDS):
+    """
+    ffmpeg output arguments forcing a keyframe every seconds of video.
+
+    Segments can only be cut on keyframes. With keyframes on the segment
+    boundaries the video is remuxed into segments of the same length without
+    re-encoding it.
+    """
+    return ['-force_key_frames', f'expr:gte(t,n_forced*{seconds})']
+
+
+def remux_hls(video_path:str, segment_seconds:int=VIDEO_HLS_SEGMENT_SECONDS, segment_type:str=VIDEO_HLS_SEGMENT_TYPE):
+    """
+    Remux a video into an HLS VOD playlist and its segments, without re-encoding.
+
+    The rendition is written to a .part directory first and moved to hls_dir(video_path)
+    once ffmpeg has finished, so a playlist on disk is always complete.
+
+    Parameters:
+        video_path: Path of the MP4 file.
+        segment_seconds: Target segment duration. Segments start on keyframes, see keyframe_args.
+        segment_type: fmp4 (init.mp4 plus .m4s fragments, any codec) or mpegts (.ts, H.264/H.265 only).
+
+    Returns:
+        The path of the playlist, or None if the remux failed.
+    """
+    if segment_type not in SEGMENT_EXTENSIONS:
+        raise ValueError(f"HLS segment type {segment_type} not supported, expected one of {list(SEGMENT_EXTENSIONS)}")
+
+    directory = hls_dir(video_path)
+    part = f"{directory}.part"
+    shutil.rmtree(part, ignore_errors=True)
+    os.makedirs(part)
+
+    command = [
+        'ffmpeg',
+        '-y',
+        '-i', video_path,
+        '-c', 'copy',  # The video is already encoded
+        '-f', 'hls',
+        '-hls_time', str(segment_seconds),
+        '-hls_playlist_type', 'vod',
+        '-hls_segment_type', segment_type,
+        '-hls_segment_filename', os.path.join(part, f"segment_%05d.{SEGMENT_EXTENSIONS[segment_type]}"),
+    ]
+    if segment_type == "fmp4":
+        command += ['-hls_fmp4_init_filename', HLS_INIT]
+
+    command.append(os.path.join(part, HLS_PLAYLIST))
+    process = subprocess.run(command)
+    if process.returncode != 0:
+        logging.error(f"Failed to remux {video_path} to HLS, ffmpeg exited with {process.returncode}")
+        shutil.rmtree(part, ignore_errors=True)
+        return None
+
+    shutil.rmtree(directory, ignore_errors=True)
+    os.rename(part, directory)
+    return os.path.join(directory, HLS_PLAYLIST)
+
+
+def dir_size(directory:str):
+    """Bytes of the files directly in a directory, 0 if it does not exist."""
+    try:
+        return sum(entry.stat().st_size for entry in os.scandir(directory) if entry.is_file())
+    except FileNotFoundError:
+        return 0
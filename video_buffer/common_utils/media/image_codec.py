@@ -0,0 +1,107 @@
+import os
+import cv2
+import struct
+import numpy as np
+from typing import Optional
+
+# store the compressed bytes of CompressedImage messages as they are, without decoding and re-encoding
+INGEST_PASSTHROUGH = os.getenv("INGEST_PASSTHROUGH", "0").lower() in ("1", "true", "yes")
+# frames handed to the buffers are 1/INGEST_DOWNSCALE of the camera resolution
+INGEST_DOWNSCALE = int(os.getenv("INGEST_DOWNSCALE", "4"))
+
+# JPEG decoders scale by 1/2, 1/4 and 1/8 in the DCT domain, far cheaper than a full decode and a resize
+REDUCED_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+if INGEST_DOWNSCALE not in REDUCED_FLAGS:
+    raise ValueError(f"INGEST_DOWNSCALE {INGEST_DOWNSCALE} not supported, expected one of {list(REDUCED_FLAGS)}")
+
+
+# start of frame markers, which carry the image size
+SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def reduced_flag(factor:int=1):
+    if factor not in REDUCED_FLAGS:
+        raise ValueError(f"downscale factor {factor} not supported, expected one of {list(REDUCED_FLAGS)}")
+    return REDUCED_FLAGS[factor]
+
+
+def decode_image(data, factor:int=1):
+    """
+    Decode compressed image bytes, downscaled while decoding.
+
+    Parameters:
+        data: The encoded image, bytes or a uint8 array.
+        factor: Downscale factor, one of 1, 2, 4 or 8.
+
+    Returns:
+        The BGR frame, or None if the bytes could not be decoded.
+    """
+    buffer = np.frombuffer(data, dtype=np.uint8) if not isinstance(data, np.ndarray) else data
+    return cv2.imdecode(buffer, reduced_flag(factor))
+
+
+def read_image(path:str, factor:int=1):
+    """Read an image file, downscaled while decoding, see decode_image."""
+    return cv2.imread(path, reduced_flag(factor))
+
+
+def jpeg_size(path:str):
+    """
+    Read the size of a JPEG file from its start of frame header, without decoding it.
+
+    Returns:
+        (width, height), or None if the file is not a JPEG.
+    """
+    with open(path, "rb") as f:
+        if f.read(2) != b"\xff\xd8":
+            return None
+
+        while True:
+            marker = f.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                return None
+            # fill bytes between segments
+            while marker[1] == 0xFF:
+                byte = f.read(1)
+                if not byte:
+                    return None
+                marker = marker[1:] + byte
+
+            length = f.read(2)
+            if len(length) < 2:
+                return None
+            if marker[1] in SOF_MARKERS:
+                _, height, width = struct.unpack(">BHH", f.read(5))
+                return width, height
+            f.seek(struct.unpack(">H", length)[0] - 2, os.SEEK_CUR)
+
+
+def reduction_factor(width:int, target_width:int):
+    """Largest decode downscale factor that still yields at least target_width pixels."""
+    if target_width <= 0:
+        return 1
+    for factor in (8, 4, 2):
+        if width // factor >= target_width:
+            return factor
+    return 1
+
+
+def encode_image(frame:np.ndarray, image_format:Optional[str]="jpg"):
+    """
+    Returns:
+        The frame encoded to image_format, as bytes.
+    """
+    ok, buffer = cv2.imencode(f".{image_format or 'jpg'}", frame)
+    if not ok:
+        raise ValueError(f"Failed to encode frame to {image_format}")
+    return buffer.tobytes()
+
+
+def compressed_format(msg_format:str):
+    """File extension of a sensor_msgs/CompressedImage format string, e.g. 'bgr8; jpeg compressed bgr8'."""
+    return "png" if "png" in (msg_format or "").lower() else "jpg"
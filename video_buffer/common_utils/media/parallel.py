@@ -0,0 +1,46 @@
+import os
+import collections
+from typing import Callable, Iterable, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+VIDEO_WORKERS = int(os.getenv("VIDEO_WORKERS", os.cpu_count() or 1))
+
+
+def imap_ordered(fn:Callable, iterable:Iterable, workers:int=VIDEO_WORKERS, queue_size:Optional[int]=None):
+    """
+    Apply fn to every item on a thread pool, yielding results in input order.
+
+    OpenCV releases the GIL while decoding, drawing and resizing, so frame work
+    scales across cores with threads. At most queue_size items are in flight or
+    waiting to be consumed, which bounds memory to a small window of frames
+    regardless of how many items there are.
+
+    Parameters:
+        fn: Function applied to each item.
+        iterable: Input items, consumed lazily.
+        workers: Number of threads. 1 runs fn inline without a pool.
+        queue_size: Bound on pending results. Defaults to twice the number of workers.
+
+    Yields:
+        fn(item) for each item, in order.
+    """
+    if workers <= 1:
+        for item in iterable:
+            yield fn(item)
+        return
+
+    queue_size = queue_size or 2 * workers
+    pending = collections.deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        try:
+            for item in iterable:
+                pending.append(executor.submit(fn, item))
+                if len(pending) >= queue_size:
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # the consumer stopped early or failed, drop what has not started yet
+            for future in pending:
+                future.cancel()
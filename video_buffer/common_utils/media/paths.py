@@ -0,0 +1,100 @@
+import os
+import re
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+IMAGES_DIR = "images"
+# minutes per image directory under the hour directory, 60 to keep one directory per hour
+IMAGE_BUCKET_MINUTES = int(os.getenv("IMAGE_BUCKET_MINUTES", "5"))
+
+
+def source_slug(source:Optional[str]):
+    """Filesystem-safe, collision-free directory name for a camera topic."""
+    source = source or "unknown"
+    name = re.sub(r"[^A-Za-z0-9]+", "_", source).strip("_")[-48:]
+    return f"{name}_{hashlib.sha1(source.encode('utf-8')).hexdigest()[:8]}"
+
+
+def bucket_start(timestamp:datetime, bucket_minutes:int=IMAGE_BUCKET_MINUTES):
+    """Start of the time bucket holding timestamp."""
+    minute = timestamp.minute // bucket_minutes * bucket_minutes if 0 < bucket_minutes < 60 else 0
+    return timestamp.replace(minute=minute, second=0, microsecond=0)
+
+
+def bucket_dir(source:Optional[str], timestamp:datetime, bucket_minutes:int=IMAGE_BUCKET_MINUTES):
+    """
+    Directory of the images of one camera captured in one time bucket, relative to MEDIA_ROOT.
+
+    Images are sharded as images/<source>/<YYYY-MM-DD>/<HH>/<MM> (UTC), MM being
+    the first minute of the bucket, or images/<source>/<YYYY-MM-DD>/<HH> with
+    hour buckets. A directory only ever holds one bucket of one camera, and an
+    expired bucket can be removed as a whole.
+    """
+    timestamp = timestamp.astimezone(timezone.utc) if timestamp.tzinfo else timestamp
+    directory = f"{IMAGES_DIR}/{source_slug(source)}/{timestamp.strftime('%Y-%m-%d')}/{timestamp.strftime('%H')}"
+    if 0 < bucket_minutes < 60:
+        directory += f"/{timestamp.minute // bucket_minutes * bucket_minutes:02d}"
+
+    return directory
+
+
+def iter_buckets(images_root:str, before:datetime):
+    """
+    Walk the image directories of every camera and yield the ones holding only images captured before a time.
+
+    A day or hour directory that ended before it is yielded as a whole instead
+    of its sub-directories.
+
+    Parameters:
+        images_root: Absolute path of the images directory.
+        before: Aware UTC datetime.
+
+    Yields:
+        (start, end, path) of the expired directories, path being absolute.
+    """
+    if not os.path.isdir(images_root):
+        return
+
+    for slug in os.listdir(images_root):
+        source_dir = os.path.join(images_root, slug)
+        if not os.path.isdir(source_dir):
+            continue
+
+        for day in sorted(os.listdir(source_dir)):
+            try:
+                day_start = datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+            except ValueError:
+                continue
+            if day_start >= before:
+                break
+
+            day_dir = os.path.join(source_dir, day)
+            if day_start + timedelta(days=1) <= before:
+                yield day_start, day_start + timedelta(days=1), day_dir
+                continue
+
+            for hour in sorted(os.listdir(day_dir)):
+                if not hour.isdigit():
+                    continue
+                hour_start = day_start + timedelta(hours=int(hour))
+                if hour_start >= before:
+                    break
+
+                hour_dir = os.path.join(day_dir, hour)
+                if hour_start + timedelta(hours=1) <= before:
+                    yield hour_start, hour_start + timedelta(hours=1), hour_dir
+                    continue
+
+                # the current hour, only its finished minute buckets
+                for minute in sorted(os.listdir(hour_dir)):
+                    if not minute.isdigit():
+                        continue
+                    start = hour_start + timedelta(minutes=int(minute))
+                    if start + timedelta(minutes=IMAGE_BUCKET_MINUTES) <= before:
+                        yield start, start + timedelta(minutes=IMAGE_BUCKET_MINUTES), os.path.join(hour_dir, minute)
+
+
+def image_filename(img_key:str, image_format:Optional[str]="jpg"):
+    """File name of an image, unique per camera since img_key is."""
+    return f"{re.sub(r'[^A-Za-z0-9._-]+', '_', str(img_key))}.{image_format or 'jpg'}"
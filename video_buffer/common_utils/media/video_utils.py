@@ -1,27 +1,38 @@
-import re
+import os
 import cv2
+import json
+import itertools
+import numpy as np
 import logging
 import subprocess
-from PIL import Image
-from decimal import Decimal
+from datetime import timedelta
+from functools import partial
+from common_utils.media.parallel import imap_ordered, VIDEO_WORKERS
+from common_utils.media.encoding import encoder_args, get_profile
+from common_utils.media.hls import keyframe_args
 
-def create_video_from_frames(output_filename, width, height, framerate=24):
+def create_video_from_frames(output_filename, width, height, framerate=24, output_args=None, profile=None, keyframe_seconds=None):
     command = [
         'ffmpeg',
         '-y',  # Overwrite output file if it exists
         '-f', 'rawvideo',  # Input format
         '-vcodec', 'rawvideo',
         '-s', f'{width}x{height}',  # Size of one frame
-        '-pix_fmt', 'rgb24',
+        '-pix_fmt', 'bgr24',  # OpenCV frames are written as they are
         '-r', str(framerate),  # Framerate
         '-i', '-',  # The input comes from a pipe
         '-an',  # No audio
-        '-vcodec', 'libx264',  # Use H.264 codec
-        '-pix_fmt', 'yuv420p',  # Pixel format for compatibility
-        '-b:v', '7000k',  # Bitrate
-        '-movflags', '+faststart',  # Fast start for MP4 files
-        output_filename
-    ]
+    ] + encoder_args(get_profile(profile))  # Codec, quality and speed settings
+    
+    if keyframe_seconds:
+        command += keyframe_args(keyframe_seconds)  # Keyframes on the HLS segment boundaries
+    
+    if output_args:
+        command += output_args  # e.g. fragmented MP4 for segments
+    else:
+        command += ['-movflags', '+faststart']  # Fast start for MP4 files
+    
+    command.append(output_filename)
 
     # Open the FFmpeg process
     process = subprocess.Popen(command, stdin=subprocess.PIPE)
@@ -30,32 +41,157 @@ def create_video_from_frames(output_filename, width, height, framerate=24):
 def convert_bgr_to_rgb(opencv_image):
     return cv2.cvtColor(opencv_image, cv2.COLOR_BGR2RGB)
 
-def generate_video(frames, framerate, video_path, scale=1.):
-    success = False
-    if not frames:
+def prepare_frame(frame, size):
+    """
+    Resize a BGR frame to size (w, h) if needed and expose it as raw bgr24 bytes for ffmpeg.
+
+    The frame is handed to the pipe through the buffer protocol, without a colour
+    conversion or a copy into a bytes object.
+    """
+    if (frame.shape[1], frame.shape[0]) != size:
+        frame = cv2.resize(frame, size, interpolation=cv2.INTER_NEAREST)
+
+    return memoryview(np.ascontiguousarray(frame)).cast("B")
+
+def generate_video(frames, framerate, video_path, scale=1., workers=VIDEO_WORKERS, profile=None, width=None,
+                   keyframe_seconds=None):
+    """
+    Encode frames into a video, streaming them into ffmpeg one at a time.
+
+    Parameters:
+        frames: Iterable of BGR frames, e.g. a generator. It is consumed lazily and never materialised.
+        framerate: Output framerate.
+        video_path: Path of the output file.
+        scale: Resize factor applied to every frame.
+        workers: Number of threads resizing and converting frames ahead of the ffmpeg writer.
+        profile: Name of the encoding profile, see common_utils.media.encoding. Defaults to VIDEO_ENCODING_PROFILE.
+        width: Output width, overrides scale. The height keeps the aspect ratio of the first frame.
+        keyframe_seconds: Force a keyframe every keyframe_seconds, for a remux to HLS segments of that length.
+
+    Returns:
+        The video metadata (see video_metadata) if the video was written, None otherwise.
+    """
+    frames = iter(frames)
+    first = next(frames, None)
+    if first is None:
         print('No data are found')
-        return success
+        return None
     
-    h0, w0, _ = frames[0].shape
-    h, w = int(h0 * scale), int(w0 * scale)
-    process = create_video_from_frames(video_path, width=w, height=h, framerate=framerate)
-    for i, frame in enumerate(frames):
-        frame = cv2.resize(frame, (w, h), interpolation=cv2.INTER_NEAREST)
-        image = Image.fromarray(convert_bgr_to_rgb(frame))
-        process.stdin.write(image.tobytes())
+    h0, w0, _ = first.shape
+    if width:
+        # yuv420p needs an even height
+        h, w = int(h0 * width / w0) // 2 * 2, width
+    else:
+        h, w = int(h0 * scale), int(w0 * scale)
+    process = create_video_from_frames(
+        video_path, width=w, height=h, framerate=framerate, profile=profile, keyframe_seconds=keyframe_seconds,
+    )
+    try:
+        # without a resize there is nothing worth a thread pool left to do per frame
+        raw_frames = imap_ordered(
+            partial(prepare_frame, size=(w, h)), itertools.chain([first], frames), 
+            workers=workers if (w, h) != (w0, h0) else 1,
+        )
+        frame_count = 0
+        for raw_frame in raw_frames:
+            process.stdin.write(raw_frame)
+            frame_count += 1
+    except Exception:
+        process.kill()
+        raise
 
     process.stdin.close()
     process.wait()
+    if process.returncode != 0:
+        return None
+
+    return video_metadata(video_path, frame_count=frame_count, width=w, height=h, framerate=framerate)
     
 
-def get_video_length(path):
-    process = subprocess.Popen(['/usr/bin/ffmpeg', '-i', path], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
-    stdout, stderr = process.communicate()
-    # Correcting the regex pattern
-    matches = re.search(r"Duration:\s(?P<hours>\d+):(?P<minutes>\d+):(?P<seconds>\d+\.\d+)", stdout.decode('utf-8'), re.DOTALL).groupdict()
+def concat_videos(paths, video_path, list_path):
+    """
+    Concatenate videos encoded with the same settings into one MP4, without re-encoding.
+
+    Parameters:
+        paths: Paths of the input videos, in playback order.
+        video_path: Path of the output file.
+        list_path: Path where the ffmpeg concat list is written.
+
+    Returns:
+        True if the video was written.
+    """
+    with open(list_path, 'w') as f:
+        for path in paths:
+            f.write(f"file '{path}'\n")
+
+    command = [
+        'ffmpeg',
+        '-y',
+        '-f', 'concat',
+        '-safe', '0',
+        '-i', list_path,
+        '-c', 'copy',  # Segments are already encoded
+        '-movflags', '+faststart',
+        video_path,
+    ]
+    process = subprocess.run(command)
+    return process.returncode == 0
+
+
+def video_metadata(video_path, frame_count, width, height, framerate):
+    """
+    Metadata of a video, from what is known while encoding it.
+
+    Returns:
+        A dict with frame_count, width, height, duration (timedelta) and video_size (bytes).
+    """
+    return {
+        "frame_count": frame_count,
+        "width": width,
+        "height": height,
+        "duration": timedelta(seconds=frame_count / framerate),
+        "video_size": os.stat(video_path).st_size,
+    }
+
+
+def probe_video(path):
+    """
+    Read the metadata of a video back with ffprobe. Only used to verify video_metadata.
+
+    Returns:
+        A dict with the same keys as video_metadata.
+    """
+    command = [
+        'ffprobe',
+        '-v', 'error',
+        '-select_streams', 'v:0',
+        '-count_packets',
+        '-show_entries', 'stream=width,height,nb_read_packets:format=duration,size',
+        '-of', 'json',
+        path,
+    ]
+    probe = json.loads(subprocess.run(command, capture_output=True, check=True).stdout)
+    stream, container = probe['streams'][0], probe['format']
+    return {
+        "frame_count": int(stream['nb_read_packets']),
+        "width": int(stream['width']),
+        "height": int(stream['height']),
+        "duration": timedelta(seconds=float(container['duration'])),
+        "video_size": int(container['size']),
+    }
 
-    hours = float(matches['hours'])
-    minutes = float(matches['minutes'])
-    seconds =float(matches['seconds'])
 
-    return hours, minutes, seconds
+def verify_metadata(path, metadata):
+    """Compare metadata computed at encode time with ffprobe, logging any mismatch."""
+    try:
+        probed = probe_video(path)
+        for key, value in metadata.items():
+            if key == "duration":
+                mismatch = abs((probed[key] - value).total_seconds()) > 1
+            else:
+                mismatch = probed[key] != value
+            
+            if mismatch:
+                logging.warning(f"Metadata mismatch for {path}: {key} is {value} at encode time, ffprobe reports {probed[key]}")
+    except Exception as err:
+        logging.error(f"Error verifying metadata of {path}: {err}")
@@ -0,0 +1,219 @@
+import django
+django.setup()
+
+import os
+import time
+import shutil
+import logging
+from typing import Callable, Dict, Iterator, Optional, Tuple
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.utils import timezone
+from database.models import Image, Video
+from common_utils.media.paths import IMAGES_DIR, iter_buckets, bucket_start
+from common_utils.media.hls import hls_dir, dir_size
+
+CLEANUP_CHUNK_SIZE = int(os.getenv("CLEANUP_CHUNK_SIZE", "1000"))
+CLEANUP_WORKERS = int(os.getenv("CLEANUP_WORKERS", "8"))
+CLEANUP_TIME_BUDGET = float(os.getenv("CLEANUP_TIME_BUDGET", "240"))  # seconds, 0 for no budget
+CLEANUP_MODE = os.getenv("CLEANUP_MODE", "buckets")  # buckets | rows
+# images written in the last seconds may not have their row yet, see ImageWriteBuffer
+CLEANUP_BUCKET_MARGIN = int(os.getenv("CLEANUP_BUCKET_MARGIN", "60"))
+
+
+def unlink(path:str):
+    """
+    Remove a file.
+
+    Returns:
+        The number of bytes freed, 0 if the file did not exist.
+    """
+    try:
+        size = os.stat(path).st_size
+        os.remove(path)
+        return size
+    except FileNotFoundError:
+        return 0
+    except Exception as err:
+        logging.error(f"Error deleting {path}: {err}")
+        return 0
+
+
+def unlink_video(path:str):
+    """
+    Remove a video file and its HLS rendition, if any.
+
+    Returns:
+        The number of bytes freed.
+    """
+    size = unlink(path)
+    directory = hls_dir(path)
+    if os.path.isdir(directory):
+        size += dir_size(directory)
+        shutil.rmtree(directory, onerror=lambda *args: logging.error(f"Error deleting {args[1]}: {args[2][1]}"))
+    return size
+
+
+def purge_chunks(queryset, file_field:str, chunk_size:int=CLEANUP_CHUNK_SIZE, executor:Optional[ThreadPoolExecutor]=None,
+                 remove:Callable[[str], int]=unlink):
+    """
+    Delete the rows of a queryset and their files, one chunk of chunk_size rows per iteration.
+
+    Each chunk selects only the ids and file names, unlinks the files on the
+    executor, then deletes the rows with a single DELETE. Files go before rows,
+    so an interrupted run leaves rows without files, which the next run removes,
+    rather than files nobody knows about.
+
+    Parameters:
+        queryset: Rows to delete.
+        file_field: Name of the file field of the model.
+        chunk_size: Number of rows per chunk.
+        executor: Thread pool unlinking the files. Files are removed inline without one.
+        remove: Function removing one file and returning the bytes freed.
+
+    Yields:
+        (rows deleted, bytes reclaimed) per chunk, until the queryset is drained.
+    """
+    queryset = queryset.order_by("expires_at")
+    while True:
+        chunk = list(queryset.values_list("id", file_field)[:chunk_size])
+        if not chunk:
+            return
+
+        ids = [pk for pk, _ in chunk]
+        paths = [os.path.join(settings.MEDIA_ROOT, name) for _, name in chunk if name]
+        freed = executor.map(remove, paths) if executor is not None else map(remove, paths)
+        freed = sum(freed)
+        deleted, _ = queryset.model.objects.filter(id__in=ids).delete()
+        yield deleted, freed
+
+
+def drain(purges:Dict[str, Iterator[Tuple[int, int]]], deadline:Optional[float]=None):
+    """
+    Run several purge_chunks one chunk each in turn, so that none of them can use up
+    the whole time budget while the others wait.
+
+    Parameters:
+        purges: purge_chunks generators by name.
+        deadline: time.monotonic() value after which no new chunk is started.
+
+    Returns:
+        A dict by name with the number of rows deleted, the bytes reclaimed, and whether the queryset was drained.
+    """
+    stats = {name: {"rows": 0, "bytes": 0, "done": False} for name in purges}
+    pending = list(purges)
+    while pending:
+        for name in list(pending):
+            if deadline is not None and time.monotonic() >= deadline:
+                return stats
+
+            chunk = next(purges[name], None)
+            if chunk is None:
+                stats[name]["done"] = True
+                pending.remove(name)
+                continue
+
+            stats[name]["rows"] += chunk[0]
+            stats[name]["bytes"] += chunk[1]
+
+    return stats
+
+
+def purge(queryset, file_field:str, chunk_size:int=CLEANUP_CHUNK_SIZE, executor:Optional[ThreadPoolExecutor]=None,
+          deadline:Optional[float]=None, remove:Callable[[str], int]=unlink):
+    """
+    Delete the rows of a queryset and their files in chunks, see purge_chunks.
+
+    Parameters:
+        deadline: time.monotonic() value after which no new chunk is started.
+
+    Returns:
+        A dict with the number of rows deleted, the bytes reclaimed, and whether the queryset was drained.
+    """
+    return drain({"rows": purge_chunks(queryset, file_field, chunk_size, executor, remove)}, deadline)["rows"]
+
+
+def expiry_cutoff(now:datetime):
+    """
+    Capture time before which every image has expired: the capture time of the
+    oldest image not expired yet, and at most CLEANUP_BUCKET_MARGIN seconds ago.
+    """
+    oldest = Image.objects.filter(expires_at__gt=now).order_by("timestamp").values_list("timestamp", flat=True).first()
+    cutoff = now - timedelta(seconds=CLEANUP_BUCKET_MARGIN)
+    return min(oldest, cutoff) if oldest is not None else cutoff
+
+
+def purge_buckets(now:datetime, deadline:Optional[float]=None):
+    """
+    Delete the expired images bucket by bucket.
+
+    Every image directory (see common_utils.media.paths.bucket_dir) that only holds
+    expired images is removed with rmtree, oldest first, and their rows are then
+    deleted with a single range DELETE on timestamp. The cost is per bucket rather
+    than per image, but this relies on images expiring in capture order, which
+    holds as long as they all get the same retention.
+
+    Returns:
+        A dict with the buckets and rows deleted, the bytes reclaimed and whether every expired bucket was removed.
+    """
+    images_root = os.path.join(settings.MEDIA_ROOT, IMAGES_DIR)
+    cutoff = expiry_cutoff(now)
+    buckets = sorted(iter_buckets(images_root, cutoff), key=lambda bucket: bucket[1])
+    free = shutil.disk_usage(settings.MEDIA_ROOT).free if os.path.isdir(settings.MEDIA_ROOT) else 0
+
+    removed = 0
+    for _, _, path in buckets:
+        if deadline is not None and time.monotonic() >= deadline:
+            break
+        shutil.rmtree(path, onerror=lambda *args: logging.error(f"Error deleting {args[1]}: {args[2][1]}"))
+        removed += 1
+
+    # rows are only range deleted up to the first bucket still on disk, images stored
+    # flat in the images directory before buckets existed are left to the row by row purge
+    until = min([bucket_start(cutoff)] + [start for start, _, _ in buckets[removed:]])
+    deleted, _ = Image.objects.filter(timestamp__lt=until).exclude(image_file__regex=rf"^{IMAGES_DIR}/[^/]*$").delete()
+    reclaimed = shutil.disk_usage(settings.MEDIA_ROOT).free - free if free else 0
+
+    return {"buckets": removed, "rows": deleted, "bytes": max(reclaimed, 0), "done": removed == len(buckets)}
+
+
+def cleanup_expired(now:Optional[datetime]=None, chunk_size:int=CLEANUP_CHUNK_SIZE, workers:int=CLEANUP_WORKERS,
+                    time_budget:float=CLEANUP_TIME_BUDGET, mode:str=CLEANUP_MODE):
+    """
+    Delete the expired images and videos with their files.
+
+    Parameters:
+        now: Expiry reference time. Defaults to the current time.
+        chunk_size: Number of rows per chunk.
+        workers: Number of threads unlinking files.
+        time_budget: Seconds after which no new chunk is started, 0 for no budget. What is
+            left is picked up by the next run.
+        mode: buckets to first drop whole expired image directories (see purge_buckets), rows
+            to only delete row by row chunks. Expired images outside the buckets are deleted
+            row by row in both modes.
+
+    Returns:
+        A dict with the rows deleted, bytes reclaimed and drained flag per model, and the elapsed seconds.
+    """
+    if mode not in ("buckets", "rows"):
+        raise ValueError(f"cleanup mode {mode} not supported, expected buckets or rows")
+
+    now = now or timezone.now()
+    start = time.monotonic()
+    deadline = start + time_budget if time_budget else None
+    results = {}
+    if mode == "buckets":
+        results["buckets"] = purge_buckets(now, deadline)
+
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        # images and videos take turns, a backlog of images must not keep the large video files around
+        results.update(drain({
+            "images": purge_chunks(Image.objects.filter(expires_at__lte=now), "image_file", chunk_size, executor),
+            "videos": purge_chunks(
+                Video.objects.filter(expires_at__lte=now), "video_file", chunk_size, executor, unlink_video,
+            ),
+        }, deadline))
+
+    results["seconds"] = round(time.monotonic() - start, 2)
+    return results
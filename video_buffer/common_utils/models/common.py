@@ -14,10 +14,17 @@ from django.conf import settings
 from database.models import (
     Image, Video, get_image_path
 )
+from common_utils.models.ingest import image_write_buffer
+from common_utils.media.image_codec import encode_image
+
+IMAGE_QUERY_CHUNK_SIZE = int(os.getenv("IMAGE_QUERY_CHUNK_SIZE", "500"))
+
+# directories known to exist, so that frames do not stat the images directory
+_known_dirs = set()
 
 
 def save_image(
-    cv_image:np.ndarray,
+    cv_image:Optional[np.ndarray],
     image_id:str,
     image_name:str,
     timestamp:datetime,
@@ -26,15 +33,19 @@ def save_image(
     image_format:Optional[str]=None,
     meta_info:Optional[Dict]=None,
     source:Optional[str]=None,
+    image_bytes:Optional[bytes]=None,
 ):
     try:
+        # already compressed bytes are written as they are
+        if image_bytes is None:
+            image_bytes = encode_image(cv_image, image_format)
         
         image = Image(
             image_id=image_id,
             image_name=image_name,
             timestamp=timestamp.replace(tzinfo=timezone.utc),
             expires_at=expires_at.replace(tzinfo=timezone.utc),
-            image_size=image_size,
+            image_size=image_size or len(image_bytes),
             image_format=image_format,
             meta_info=meta_info,
             source=source
@@ -43,29 +54,55 @@ def save_image(
         image_file = get_image_path(image, filename=image_name)
         image_path = f"{settings.MEDIA_ROOT}/{image_file}"
         
-        print(image_path)
-        if not os.path.exists(
-            os.path.dirname(image_path)
-        ):
-            os.makedirs(
-                os.path.dirname(image_path)
-            )
-            
+        image_dir = os.path.dirname(image_path)
+        if image_dir not in _known_dirs:
+            os.makedirs(image_dir, exist_ok=True)
+            _known_dirs.add(image_dir)
         
-        cv2.imwrite(image_path, cv_image)
+        with open(image_path, "wb") as f:
+            f.write(image_bytes)
         image.image_file = image_file
-        image.save()
+        # inserted in bulk by the write-behind buffer
+        image_write_buffer.add(image)
         
     except Exception as err:
         print(err)
         logging.error(f"Error saving image: {err}")
         
 
-def get_images(from_time:datetime, to_time:datetime):
-    return Image.objects.filter(
+def get_images(from_time:datetime, to_time:datetime, source:Optional[str]=None):
+    """
+    Images captured in [from_time, to_time), oldest first.
+
+    Only the columns needed to read and annotate the frames are selected, as
+    named rows (image_id, image_file, timestamp, source). The query is lazy,
+    use count() to size the window and iter_images to stream the rows.
+    """
+    images = Image.objects.filter(
         timestamp__gte=from_time, 
         timestamp__lt=to_time
-        ).order_by('timestamp')
+        )
+    if source is not None:
+        images = images.filter(source=source)
+    
+    return images.order_by('timestamp').values_list(
+        'image_id', 'image_file', 'timestamp', 'source', named=True
+    )
+
+def get_sources(from_time:datetime, to_time:datetime):
+    """Distinct sources of the images captured in [from_time, to_time), None for images without one."""
+    return list(
+        Image.objects.filter(timestamp__gte=from_time, timestamp__lt=to_time)
+        .order_by('source').values_list('source', flat=True).distinct()
+    )
+
+def iter_images(images, chunk_size:int=IMAGE_QUERY_CHUNK_SIZE):
+    """
+    Stream the rows of get_images through a server-side cursor, chunk_size rows at a time,
+    with image_file resolved to the absolute path of the file.
+    """
+    for image in images.iterator(chunk_size=chunk_size):
+        yield image._replace(image_file=f"{settings.MEDIA_ROOT}/{image.image_file}")
     
 def get_video(
     video_id:str,
@@ -0,0 +1,109 @@
+import django
+django.setup()
+
+import os
+import time
+import atexit
+import logging
+import threading
+from django.db import connection, IntegrityError
+from database.models import Image
+from cleanup.retention import retention_trigger
+
+IMAGE_BULK_SIZE = int(os.getenv("IMAGE_BULK_SIZE", "50"))
+IMAGE_FLUSH_INTERVAL_MS = int(os.getenv("IMAGE_FLUSH_INTERVAL_MS", "500"))
+
+
+class ImageWriteBuffer:
+    """
+    Write-behind buffer for Image rows.
+
+    Rows are accumulated in memory and inserted with a single bulk_create every
+    batch_size rows or flush_interval_ms milliseconds, whichever comes first, on a
+    background thread. The caller (the ROS callback thread) never waits for the
+    database. Pending rows are flushed when the process exits.
+
+    Attributes:
+        batch_size: Number of rows that triggers a flush.
+        flush_interval: Maximum time in seconds a row stays in the buffer.
+    """
+    def __init__(self, batch_size:int=IMAGE_BULK_SIZE, flush_interval_ms:int=IMAGE_FLUSH_INTERVAL_MS):
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval = flush_interval_ms / 1000
+        self.pending = []
+        self.condition = threading.Condition()
+        self.thread = None
+        self.closed = False
+
+    def start(self):
+        with self.condition:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="image-write-buffer", daemon=True)
+                self.thread.start()
+                atexit.register(self.close)
+
+    def add(self, image:Image):
+        if self.thread is None:
+            self.start()
+
+        with self.condition:
+            self.pending.append(image)
+            if len(self.pending) >= self.batch_size:
+                self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                deadline = time.monotonic() + self.flush_interval
+                while len(self.pending) < self.batch_size and not self.closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+
+                if self.closed:
+                    return
+
+            self.flush()
+
+    def flush(self):
+        """Insert all pending rows."""
+        with self.condition:
+            batch, self.pending = self.pending, []
+
+        if not batch:
+            return 0
+
+        try:
+            Image.objects.bulk_create(batch, batch_size=max(self.batch_size, 500))
+        except IntegrityError as err:
+            # one bad row (e.g. a duplicate image_id) must not drop the whole batch
+            logging.warning(f"Bulk insert of {len(batch)} images failed, inserting one by one: {err}")
+            for image in batch:
+                try:
+                    image.save()
+                except Exception as err:
+                    logging.error(f"Error saving image {image.image_id}: {err}")
+        except Exception as err:
+            logging.error(f"Error inserting {len(batch)} images: {err}")
+            # reconnect on the next flush
+            connection.close()
+            return 0
+
+        # a burst of ingest asks for a retention check without waiting for the beat
+        retention_trigger.add(sum(image.image_size or 0 for image in batch))
+        return len(batch)
+
+    def close(self):
+        """Stop the background thread and flush what is left."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join(timeout=5)
+
+        self.flush()
+
+
+image_write_buffer = ImageWriteBuffer()
@@ -0,0 +1,138 @@
+import os
+import time
+import logging
+import threading
+from collections import deque, defaultdict
+from typing import Callable, Optional
+
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "100"))
+# worker threads shared by the topics of a node, 0 for one per topic,
+# the items of one topic are always handled by the same one
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "0"))
+INGEST_QUEUE_POLICY = os.getenv("INGEST_QUEUE_POLICY", "drop-oldest")  # drop-oldest | drop-newest | block
+INGEST_STATS_INTERVAL = float(os.getenv("INGEST_STATS_INTERVAL", "60"))
+
+POLICIES = ("drop-oldest", "drop-newest", "block")
+
+
+class HandoffQueue:
+    """
+    Bounded queue between the ROS subscriber threads and a pool of worker threads.
+
+    Producers only enqueue, the workers run the handler on each item, so a slow
+    disk or database never blocks message reception. Each topic is assigned to
+    one worker, so the items of a topic are handled one at a time and in order:
+    the frame buffers and segment writers downstream expect a single writer per
+    topic. When the queue of a worker is full the policy decides what happens:
+        drop-oldest: the oldest queued item is discarded to make room.
+        drop-newest: the incoming item is discarded.
+        block: the producer waits until a worker frees a slot.
+
+    Per topic counters of received, dropped, processed and failed items, and the
+    processed throughput since the previous report, are logged every
+    stats_interval seconds.
+
+    Attributes:
+        handler: Callable run by the workers with the enqueued arguments.
+        name: Name used in the worker thread names and the logs.
+        maxsize: Capacity of the queue of each worker.
+        workers: Number of worker threads.
+        policy: One of POLICIES.
+        stats: Counters per topic.
+    """
+    def __init__(self, handler:Callable, maxsize:int=INGEST_QUEUE_SIZE, workers:int=INGEST_WORKERS,
+                 policy:str=INGEST_QUEUE_POLICY, stats_interval:Optional[float]=INGEST_STATS_INTERVAL,
+                 name:str="ingest"):
+        if policy not in POLICIES:
+            raise ValueError(f"queue policy {policy} not supported, expected one of {POLICIES}")
+
+        self.handler = handler
+        self.name = name
+        self.maxsize = max(maxsize, 1)
+        self.policy = policy
+        self.stats_interval = stats_interval
+        self.lock = threading.Lock()
+        self.shards = [
+            (deque(), threading.Condition(self.lock), threading.Condition(self.lock)) for _ in range(max(workers, 1))
+        ]
+        self.assignments = {}
+        self.stats = defaultdict(lambda: {"received": 0, "dropped": 0, "processed": 0, "failed": 0})
+        self.last_report = time.monotonic()
+        self.last_processed = {}
+        self.threads = [
+            threading.Thread(target=self._work, args=(shard,), name=f"{name}-worker-{i}", daemon=True)
+            for i, shard in enumerate(self.shards)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def put(self, topic:str, *args):
+        """
+        Hand an item over to the workers.
+
+        Returns:
+            False if the item was dropped, True otherwise.
+        """
+        with self.lock:
+            if topic not in self.assignments:
+                self.assignments[topic] = self.shards[len(self.assignments) % len(self.shards)]
+            items, not_empty, not_full = self.assignments[topic]
+
+            self.stats[topic]["received"] += 1
+            if len(items) >= self.maxsize:
+                if self.policy == "drop-newest":
+                    self.stats[topic]["dropped"] += 1
+                    return False
+                elif self.policy == "drop-oldest":
+                    dropped_topic, _ = items.popleft()
+                    self.stats[dropped_topic]["dropped"] += 1
+                else:
+                    while len(items) >= self.maxsize:
+                        not_full.wait()
+
+            items.append((topic, args))
+            not_empty.notify()
+
+        return True
+
+    def _work(self, shard):
+        items, not_empty, not_full = shard
+        while True:
+            with self.lock:
+                while not items:
+                    not_empty.wait()
+                topic, args = items.popleft()
+                not_full.notify()
+
+            try:
+                self.handler(topic, *args)
+                outcome = "processed"
+            except Exception as err:
+                logging.error(f"Error processing message from {topic}: {err}")
+                outcome = "failed"
+
+            with self.lock:
+                self.stats[topic][outcome] += 1
+
+            if self.stats_interval is not None:
+                self.report(force=False)
+
+    def qsize(self):
+        with self.lock:
+            return sum(len(items) for items, _, _ in self.shards)
+
+    def report(self, force:bool=True):
+        """Log the counters, unless force is False and the last report is less than stats_interval old."""
+        with self.lock:
+            now = time.monotonic()
+            if not force and now - self.last_report < self.stats_interval:
+                return
+            elapsed = max(now - self.last_report, 1e-6)
+            stats = {topic: dict(counters) for topic, counters in self.stats.items()}
+            for topic, counters in stats.items():
+                counters["fps"] = round((counters["processed"] - self.last_processed.get(topic, 0)) / elapsed, 2)
+                self.last_processed[topic] = counters["processed"]
+            self.last_report = now
+            size = sum(len(items) for items, _, _ in self.shards)
+
+        logging.info(f"Ingest queue {self.name} {size}/{self.maxsize * len(self.shards)} ({self.policy}): {stats}")
@@ -21,12 +21,18 @@ from std_msgs.msg import Header
 from cv_bridge import CvBridge, CvBridgeError
 from sensor_msgs.msg import Image, CompressedImage
 from typing import Optional, Union, List, AnyStr
-from common_utils.time.time_tracker import KeepTrackOfTime
+from common_utils.time.rate_limiter import TopicRateLimiter
+from common_utils.services.handoff import HandoffQueue, INGEST_WORKERS
+from common_utils.media.image_codec import (
+    INGEST_PASSTHROUGH, INGEST_DOWNSCALE, decode_image, compressed_format
+)
+from common_utils.media.paths import image_filename
 
 def default_process_messages(messages):
     print(f'DEFAULT CALLBACK: {messages.keys()}')
   
-keep_track_of_time = KeepTrackOfTime()  
+# each camera is sampled at its own target rate, see INGEST_TARGET_FPS and INGEST_TOPIC_FPS
+rate_limiter = TopicRateLimiter()
 
 class ROSManager:
     def __init__(
@@ -43,6 +49,10 @@ class ROSManager:
             
         assert len(topics) == len(msg_type), f"length of given topics {len(topics)} must be equal length of msg type {len(msg_type)}"        
         
+        # decoding and persisting run on INGEST_WORKERS workers shared by the topics, the subscriber threads
+        # only enqueue, each topic stays on one worker: its frames must reach the frame buffer and the
+        # segment writer one at a time and in order
+        self.handoff = HandoffQueue(handler=self.process_message, workers=INGEST_WORKERS or len(topics))
         self.init_node(node_name)
         for i, topic in enumerate(topics):
             self.create_subscription(
@@ -51,11 +61,20 @@ class ROSManager:
                 self.callback_factory(topic, callback), 
                 10
                 )
+        
+        # every topic is subscribed, rospy serves each subscription on its own thread
+        self.spin()
+
+    def spin(self):
+        try:
+            rospy.spin()
+        except Exception as err:
+            logging.error("Unexpected Error while spinning ros node: %s" % err)
 
     def create_subscription(self, msg_type, topic, callback, queue_size=10):
         try:
             rospy.Subscriber(topic, msg_type, callback, queue_size=queue_size)
-            rospy.spin()
+            logging.info("Subscribed to %s" % topic)
         except Exception as err:
             logging.error(
                 "Unexpected Error while listening to topic %s: %s"
@@ -74,36 +93,54 @@ class ROSManager:
         """
         Default Callback to image subscription
         """
+        handoff = self.handoff
         def callback_(msg):
             
-            if keep_track_of_time.check_if_time_less_than_diff(
-                start=keep_track_of_time.what_is_the_time,
-                end=time.time(),
-                diff=1,
-            ):
+            if not rate_limiter.allow(topic, msg):
                 return
             
-            logging.info(f"Received message from {topic}")
+            logging.debug(f"Received message from {topic}")
+            handoff.put(
+                topic, msg, str(time.time()), datetime.now(tz=timezone.utc), callback
+            )
+                
+        return callback_
+    
+    def process_message(self, topic, msg, img_key, dt, callback=None):
+        """
+        Decode a received message and hand it to the callback, run on the handoff workers.
+        """
+        image_bytes, image_format = None, "jpg"
+        if type(msg) == CompressedImage:
+            image_format = compressed_format(msg.format)
+            if INGEST_PASSTHROUGH:
+                # written to disk as received, the callback decodes a small copy only if it needs one
+                image_bytes, cv_image = bytes(msg.data), None
+            else:
+                # downscaled while decoding instead of decoding the full frame and resizing it
+                cv_image = decode_image(msg.data, INGEST_DOWNSCALE)
+                if cv_image is None:
+                    raise ValueError(f"Failed to decode compressed image from {topic}")
+        else:
             cv_image = self.msg_to_cv2(msg)
             h0, w0, _ = cv_image.shape
-            cv_image = cv2.resize(cv_image, (int(w0 * 0.25), int(h0 * 0.25)), interpolation=cv2.INTER_NEAREST)
-            
-            dt = datetime.now(tz=timezone.utc)
-            payload = {
-                "cv_image": cv_image,
-                "img_key": str(time.time()),
-                "timestamp": str(msg.header.stamp),
-                "set_name": str(topic),
-                "datetime": dt.strftime("%Y-%m-%d %H:%M:%S"),
-                "filename": dt.strftime("%Y-%m-%d_%H-%M-%S") + '.jpg',
-            }
+            cv_image = cv2.resize(
+                cv_image, (int(w0 / INGEST_DOWNSCALE), int(h0 / INGEST_DOWNSCALE)), interpolation=cv2.INTER_NEAREST
+            )
+        
+        payload = {
+            "cv_image": cv_image,
+            "image_bytes": image_bytes,
+            "img_key": img_key,
+            "timestamp": str(msg.header.stamp),
+            "set_name": str(topic),
+            "datetime": dt.strftime("%Y-%m-%d %H:%M:%S"),
+            "received_at": dt,
+            "filename": image_filename(img_key, image_format),
+        }
 
-            if callback:
-                callback(payload)
-            
-            keep_track_of_time.update_time()
-                
-        return callback_
+        if callback:
+            callback(payload)
         
     def message_type(self, msg_type):
         try:
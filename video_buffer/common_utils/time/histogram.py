@@ -0,0 +1,97 @@
+import time
+import bisect
+import logging
+import threading
+from typing import List, Optional
+
+# upper bounds of the buckets in milliseconds, the last bucket is unbounded
+DEFAULT_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram, logged and reset every report_interval seconds.
+
+    Attributes:
+        name: Name used in the log line.
+        buckets: Upper bounds of the buckets in milliseconds.
+        counts: Number of observations per bucket, plus one for the overflow bucket.
+        report_interval: Seconds between two reports, None to never report on its own.
+    """
+    def __init__(self, name:str, buckets:Optional[List[float]]=None, report_interval:Optional[float]=60):
+        self.name = name
+        self.buckets = sorted(buckets or DEFAULT_BUCKETS_MS)
+        self.report_interval = report_interval
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.total = 0.
+        self.max = 0.
+        self.since = time.monotonic()
+
+    def observe(self, seconds:float):
+        ms = seconds * 1000
+        with self.lock:
+            self.counts[bisect.bisect_left(self.buckets, ms)] += 1
+            self.total += ms
+            self.max = max(self.max, ms)
+
+            due = self.report_interval is not None and time.monotonic() - self.since >= self.report_interval
+
+        if due:
+            self.report()
+
+    def time(self):
+        """Context manager observing the time spent in its block."""
+        return _Timer(self)
+
+    def quantile(self, q:float):
+        """Upper bound in milliseconds of the bucket holding the q-quantile."""
+        n = sum(self.counts)
+        if not n:
+            return 0.
+
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= q * n:
+                return self.buckets[i] if i < len(self.buckets) else self.max
+        return self.max
+
+    def summary(self):
+        n = sum(self.counts)
+        return {
+            "count": n,
+            "mean_ms": round(self.total / n, 2) if n else 0.,
+            "p50_ms": self.quantile(0.5),
+            "p90_ms": self.quantile(0.9),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": round(self.max, 2),
+            "buckets": dict(zip([f"<={b}" for b in self.buckets] + [f">{self.buckets[-1]}"], self.counts)),
+        }
+
+    def report(self):
+        """Log the observations since the last report and start over."""
+        with self.lock:
+            if not sum(self.counts):
+                self.since = time.monotonic()
+                return
+            summary = self.summary()
+            self._reset()
+
+        logging.info(f"{self.name} latency: {summary}")
+
+
+class _Timer:
+    def __init__(self, histogram:LatencyHistogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
@@ -0,0 +1,104 @@
+import os
+import time
+import threading
+from typing import Dict, Optional
+
+INGEST_TARGET_FPS = float(os.getenv("INGEST_TARGET_FPS", "1"))
+INGEST_TOPIC_FPS = os.getenv("INGEST_TOPIC_FPS", "")  # /topic_a=2,/topic_b=0.5
+INGEST_RATE_BURST = float(os.getenv("INGEST_RATE_BURST", "1"))
+INGEST_RATE_CLOCK = os.getenv("INGEST_RATE_CLOCK", "wall")  # wall | header
+
+
+def parse_topic_rates(value:str=INGEST_TOPIC_FPS):
+    """Parse per topic target rates given as topic=fps pairs separated by commas."""
+    rates: Dict[str, float] = {}
+    for item in value.split(","):
+        if "=" in item:
+            topic, fps = item.rsplit("=", 1)
+            rates[topic.strip()] = float(fps)
+
+    return rates
+
+
+class RateLimiter:
+    """
+    Limits one stream of messages to a target rate, letting up to burst messages
+    through back to back.
+
+    Each accepted message moves the time the next one is allowed at (next_at)
+    forward by 1/fps from where it was, not from the arrival time of the message,
+    so the time by which an arrival overshoots next_at is carried over and the
+    sampled rate matches fps instead of falling short of it. After an idle period
+    of more than 1/fps the schedule restarts from the arrival time. With a burst
+    of 1 this samples the stream at the target rate. The clock is whatever the
+    caller passes as now, e.g. the message header stamp, so a burst of late
+    messages is judged by when they were captured rather than when they arrived.
+
+    Attributes:
+        fps: Target rate, 0 or less to let every message through.
+        burst: Maximum number of messages let through back to back.
+    """
+    def __init__(self, fps:float=INGEST_TARGET_FPS, burst:float=INGEST_RATE_BURST):
+        self.fps = fps
+        self.burst = max(burst, 1.)
+        self.next_at = None
+        self.last = None
+        self.lock = threading.Lock()
+
+    def allow(self, now:Optional[float]=None):
+        """
+        Returns:
+            True if a message at time now (seconds, defaults to the wall clock) is let through.
+        """
+        if self.fps <= 0:
+            return True
+
+        now = time.time() if now is None else now
+        interval = 1. / self.fps
+        with self.lock:
+            # the clock went backwards (e.g. a replayed bag), start over
+            if self.next_at is None or now < self.last:
+                self.next_at = now
+            self.last = now
+
+            # a microsecond of slack, arrivals exactly on the schedule are not lost to float rounding
+            if now + 1e-6 < self.next_at - (self.burst - 1) * interval:
+                return False
+
+            # keep the overshoot, unless the stream was idle for more than an interval
+            self.next_at = (now if now - self.next_at >= interval else self.next_at) + interval
+            return True
+
+
+class TopicRateLimiter:
+    """
+    One RateLimiter per topic, with the target rate of each topic taken from
+    INGEST_TOPIC_FPS and INGEST_TARGET_FPS otherwise.
+
+    Attributes:
+        clock: wall to use the arrival time, header to use the message header stamps.
+    """
+    def __init__(self, default_fps:float=INGEST_TARGET_FPS, topic_fps:Optional[Dict[str, float]]=None,
+                 burst:float=INGEST_RATE_BURST, clock:str=INGEST_RATE_CLOCK):
+        if clock not in ("wall", "header"):
+            raise ValueError(f"rate clock {clock} not supported, expected wall or header")
+
+        self.default_fps = default_fps
+        self.topic_fps = parse_topic_rates() if topic_fps is None else topic_fps
+        self.burst = burst
+        self.clock = clock
+        self.limiters: Dict[str, RateLimiter] = {}
+
+    def limiter(self, topic:str):
+        if topic not in self.limiters:
+            self.limiters[topic] = RateLimiter(fps=self.topic_fps.get(topic, self.default_fps), burst=self.burst)
+        return self.limiters[topic]
+
+    def allow(self, topic:str, msg=None):
+        now = None
+        if self.clock == "header" and msg is not None and hasattr(msg, "header"):
+            stamp = msg.header.stamp.to_sec()
+            # unstamped messages fall back to the wall clock
+            now = stamp if stamp > 0 else None
+
+        return self.limiter(topic).allow(now)
@@ -0,0 +1,55 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+
+class TTLCache:
+    """
+    In-process LRU cache whose entries expire after ttl seconds.
+
+    Attributes:
+        maxsize: Maximum number of entries, the least recently used one is evicted past it.
+        ttl: Seconds an entry is served for.
+        version: Optional callable returning the current version of the cached data.
+            Entries stored under another version are treated as missing.
+    """
+    def __init__(self, maxsize:int=128, ttl:float=300, version:Optional[Callable[[], Hashable]]=None):
+        self.maxsize = max(maxsize, 1)
+        self.ttl = ttl
+        self.version = version
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def current_version(self):
+        return self.version() if self.version is not None else None
+
+    def get(self, key:Hashable):
+        version = self.current_version()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+
+            value, expires, entry_version = entry
+            if expires <= time.monotonic() or entry_version != version:
+                del self.entries[key]
+                return None
+
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key:Hashable, value, version:Optional[Hashable]=None):
+        """
+        Store a value. Pass the version read before computing it, so that a value
+        computed from data changed in the meantime is not served.
+        """
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + self.ttl, version)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
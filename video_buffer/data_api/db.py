@@ -0,0 +1,32 @@
+import os
+import django
+from functools import partial
+from typing import Callable
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+
+django.setup()
+from django.db import close_old_connections
+
+# threads running the ORM queries of the API, each keeps its own persistent database connection
+DATA_API_DB_WORKERS = int(os.getenv("DATA_API_DB_WORKERS", "8"))
+
+_executor = ThreadPoolExecutor(max_workers=DATA_API_DB_WORKERS, thread_name_prefix="data-api-db")
+
+
+def _call(fn:Callable, *args, **kwargs):
+    # outside of Django's request cycle nothing else recycles the connections, drop the ones
+    # that are past CONN_MAX_AGE or unusable before querying, the others are reused
+    close_old_connections()
+    return fn(*args, **kwargs)
+
+
+async def run_query(fn:Callable, *args, **kwargs):
+    """
+    Run a synchronous ORM function without blocking the event loop.
+
+    The function runs on a dedicated pool of DATA_API_DB_WORKERS threads rather than
+    the single thread Django's async ORM serialises queries on, so concurrent requests
+    query concurrently over a fixed set of pooled connections.
+    """
+    return await sync_to_async(partial(_call, fn), thread_sensitive=False, executor=_executor)(*args, **kwargs)
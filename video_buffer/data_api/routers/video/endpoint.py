@@ -19,6 +19,7 @@ from fastapi.routing import APIRoute
 from .queries import data
 from .queries import metadata
 from .queries import assets
+from .queries import stream
 
 class TimedRoute(APIRoute):
     def get_route_handler(self) -> Callable:
@@ -45,4 +46,5 @@ router = APIRouter(
 
 router.include_router(metadata.router)
 router.include_router(data.router)
-router.include_router(assets.router)
\ No newline at end of file
+router.include_router(assets.router)
+router.include_router(stream.router)
\ No newline at end of file
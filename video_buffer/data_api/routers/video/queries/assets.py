@@ -2,7 +2,6 @@ import os
 import time
 import math
 import django
-from django.db import connection
 from django.db.models import Q
 from fastapi import status
 from datetime import datetime
@@ -16,8 +15,10 @@ from fastapi import HTTPException
 from fastapi.routing import APIRoute
 
 django.setup()
+from data_api.db import run_query
 from django.core.exceptions import ObjectDoesNotExist
 from database.models import Video
+from common_utils.media.hls import HLS_PLAYLIST
 
 
 DATE_FORMAT = "%Y-%m-%d"
@@ -51,7 +52,12 @@ description = """
 @router.api_route(
     "/video/{video_id}", methods=["GET"], tags=["Video"], description=description
 )
-def get_data(response: Response, video_id:str):
+async def get_data(request: Request, response: Response, video_id:str):
+    stream_url = str(request.url_for("stream_video", video_id=video_id))
+    hls_url = str(request.url_for("stream_hls", video_id=video_id, filename=HLS_PLAYLIST))
+    return await run_query(query_video, response, video_id, stream_url, hls_url)
+
+def query_video(response: Response, video_id:str, stream_url:str=None, hls_url:str=None):
     results:dict = {}
     try:
         
@@ -72,6 +78,8 @@ def get_data(response: Response, video_id:str):
                 {
                     "name": media.video_name,
                     "url": media.video_file.url,
+                    "stream_url": stream_url,
+                    "hls_url": hls_url if (media.meta_info or {}).get("hls") else None,
                     "timestamp": media.created_at.strftime(f"{DATE_FORMAT} {TIME_FORMAT}"),
                     "type": "video",
                 }
@@ -95,8 +103,6 @@ def get_data(response: Response, video_id:str):
         # results["detail"] = "data retrieved successfully"
         # results["status_description"] = "OK"
         
-        connection.close()
-        
     except ObjectDoesNotExist as e:
         results['error'] = {
             'status_code': "non-matching-query",
@@ -1,14 +1,15 @@
 import os
+import json
 import time
 import math
+import base64
 import django
-from django.db import connection
 from django.db.models import Q
 from fastapi import status
 from datetime import datetime
 from datetime import timedelta
 from datetime import timezone
-from typing import Callable, List
+from typing import Callable, List, Optional
 from fastapi import Request
 from fastapi import Response
 from fastapi import APIRouter
@@ -17,12 +18,16 @@ from pydantic import BaseModel
 from fastapi.routing import APIRoute
 
 django.setup()
+from data_api.db import run_query
+from django.db import connection
 from django.core.exceptions import ObjectDoesNotExist
 from database.models import Video
 
 
 DATE_FORMAT = "%Y-%m-%d"
 TIME_FORMAT = "%H:%M:%S"
+# ranges with more videos than this get the planner's estimate as total_record instead of an exact count
+VIDEO_EXACT_COUNT_LIMIT = int(os.getenv("VIDEO_EXACT_COUNT_LIMIT", "10000"))
 
 class TimedRoute(APIRoute):
     def get_route_handler(self) -> Callable:
@@ -59,28 +64,84 @@ class VideoResponse(BaseModel):
     type: str
     total_record: int
     pages: int
+    estimated: bool = False
+    next_cursor: Optional[str] = None
     items: List[VideoItemResponse]
 
+
+def count_videos(queryset):
+    """
+    Count the rows of a queryset, counting at most VIDEO_EXACT_COUNT_LIMIT of them.
+
+    Past the limit the count of the PostgreSQL planner is returned instead, so
+    that the cost of a request does not grow with the number of videos in range.
+    Other databases always get an exact count.
+
+    Returns:
+        (count, estimated)
+    """
+    if VIDEO_EXACT_COUNT_LIMIT <= 0 or connection.vendor != 'postgresql':
+        return queryset.count(), False
+
+    count = queryset[:VIDEO_EXACT_COUNT_LIMIT + 1].count()
+    if count <= VIDEO_EXACT_COUNT_LIMIT:
+        return count, False
+
+    plan = json.loads(queryset.explain(format='json'))
+    return max(int(plan[0]['Plan']['Plan Rows']), count), True
+
+
+def encode_cursor(created_at:datetime, pk:int):
+    """Opaque cursor pointing after the video created at created_at with primary key pk."""
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{pk}".encode()).decode()
+
+
+def decode_cursor(cursor:str):
+    """
+    Returns:
+        (created_at, pk) of a cursor built by encode_cursor. Raises ValueError if it is malformed.
+    """
+    created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+    return datetime.fromisoformat(created_at), int(pk)
+
 description = """
-    TO DO
+    Videos created between from_date and to_date, newest first.
+
+    Pages are selected with page and items_per_page. For deep pages, pass the
+    next_cursor of the previous response as cursor instead of page: the next
+    items_per_page videos are then found through the created_at index rather
+    than by skipping the previous pages. total_record is exact up to
+    VIDEO_EXACT_COUNT_LIMIT videos and estimated above, estimated is then true.
 """
 
 @router.api_route(
     "/video", methods=["GET"], tags=["Video"], description=description
 )
-def get_data(
+async def get_data(
+    response: Response, 
+    gate_id:str=None, 
+    from_date:datetime=None, 
+    to_date:datetime=None, 
+    items_per_page:int=15, 
+    page:int=1, 
+    metadata_id:int=1,
+    cursor:Optional[str]=None,
+    ):
+    return await run_query(query_videos, response, gate_id, from_date, to_date, items_per_page, page, metadata_id, cursor)
+
+def query_videos(
     response: Response, 
     gate_id:str=None, 
     from_date:datetime=None, 
     to_date:datetime=None, 
     items_per_page:int=15, 
     page:int=1, 
-    metadata_id:int=1
+    metadata_id:int=1,
+    cursor:Optional[str]=None,
     ):
     results:dict = {}
     try:
         
-        result = []
         today = datetime.today()
         if from_date is None:
             from_date = datetime(today.year, today.month, today.day)
@@ -104,31 +165,46 @@ def get_data(
             response.status_code = status.HTTP_400_BAD_REQUEST
             return results
         
-        videos = Video.objects.filter(created_at__range=(from_date, to_date)).order_by('-created_at')
+        videos = Video.objects.filter(created_at__range=(from_date, to_date))
+        total_record, estimated = count_videos(videos)
+        videos = videos.order_by('-created_at', '-id')
+        if cursor:
+            try:
+                created_at, pk = decode_cursor(cursor)
+            except ValueError:
+                results['error'] = {
+                    'status_code': 'bad request',
+                    'status_description': f'Bad Request, invalid cursor {cursor}',
+                    'detail': "cursor is not one returned as next_cursor."
+                }
+
+                response.status_code = status.HTTP_400_BAD_REQUEST
+                return results
+
+            videos = videos.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))[:items_per_page]
+        else:
+            videos = videos[(page - 1) * items_per_page:page * items_per_page]
+
         rows = []
-        total_record = len(videos)
-        for video in videos[(page - 1) * items_per_page:page * items_per_page]:
-            
-            beginn = video.start_time
-            ende = video.end_time
-
-
-              
-            row = VideoItemResponse(
-                video_id=video.video_id,
-                date=(beginn + timedelta(hours=2)).strftime('%Y-%m-%d'),
-                start=(beginn + timedelta(hours=2)).strftime('%H:%M:%S'),
-                end=(ende + timedelta(hours=2)).strftime('%H:%M:%S'),
-                location='Tor06'
-            )
-            
-            rows.append(row.dict())
-        
+        videos = list(videos.values_list('id', 'video_id', 'start_time', 'end_time', 'created_at', named=True))
+        for video in videos:
+            beginn = video.start_time + timedelta(hours=2)
+            ende = video.end_time + timedelta(hours=2)
+            rows.append({
+                'video_id': video.video_id,
+                'date': beginn.strftime(DATE_FORMAT),
+                'start': beginn.strftime(TIME_FORMAT),
+                'end': ende.strftime(TIME_FORMAT),
+                'location': 'Tor06',
+            })
+
         results = {
             "data": VideoResponse(
             type='collection',
             total_record=total_record,
             pages=math.ceil(total_record / items_per_page),
+            estimated=estimated,
+            next_cursor=encode_cursor(videos[-1].created_at, videos[-1].id) if len(videos) == items_per_page else None,
             items=rows,
         )
         }
@@ -1,10 +1,11 @@
 
 
 import os
+import json
 import time
 import math
+import hashlib
 import django
-from django.db import connection
 from django.db.models import Q
 from fastapi import status
 from datetime import datetime
@@ -18,6 +19,8 @@ from fastapi import HTTPException
 from fastapi.routing import APIRoute
 
 django.setup()
+from data_api.db import run_query
+from data_api.cache import TTLCache
 from django.core.exceptions import ObjectDoesNotExist
 from metadata.models import (
     Metadata,
@@ -25,9 +28,15 @@ from metadata.models import (
     MetadataLocalization,
     Language,
 )
+from metadata.signals import metadata_version
 
 DATE_FORMAT = "%Y-%m-%d"
 TIME_FORMAT = "%H:%M:%S"
+METADATA_CACHE_TTL = float(os.getenv("METADATA_CACHE_TTL", "300"))
+METADATA_CACHE_SIZE = int(os.getenv("METADATA_CACHE_SIZE", "128"))
+
+# metadata only changes through the admin, whose saves invalidate the cache through metadata.signals
+metadata_cache = TTLCache(maxsize=METADATA_CACHE_SIZE, ttl=METADATA_CACHE_TTL, version=metadata_version)
 
 class TimedRoute(APIRoute):
     def get_route_handler(self) -> Callable:
@@ -64,7 +73,7 @@ The `metadata_id` is used to specify which set of metadata to retrieve.
 - **metadata_id**: An integer representing the ID of the metadata to retrieve. Default is 1.
 
 ### Responses
-- **200 OK**: Returns the metadata details.
+- **200 OK**: Returns the metadata details, with an ETag. Requests sending it back in If-None-Match get a 304 Not Modified.
 - **404 Not Found**: Returns an error if the specified metadata ID or language is not found.
 - **500 Internal Server Error**: Returns an error if an unexpected error occurs.
 """
@@ -73,10 +82,35 @@ The `metadata_id` is used to specify which set of metadata to retrieve.
 @router.api_route(
     "/video/metadata/{language}", methods=["GET"], tags=["Video"], summary=summary, description=description,
 )
-def get_delivery_metadata(response: Response, language:str="de", metadata_id:int=1):
+async def get_delivery_metadata(request: Request, language:str="de", metadata_id:int=1):
+    key = (metadata_id, language)
+    cached = metadata_cache.get(key)
+    if cached is None:
+        version = metadata_cache.current_version()
+        status_code, metadata = await run_query(query_metadata, language, metadata_id)
+        body = json.dumps(metadata, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        cached = (status_code, body, f'"{hashlib.sha1(body).hexdigest()}"')
+        if status_code != status.HTTP_500_INTERNAL_SERVER_ERROR:
+            metadata_cache.set(key, cached, version)
+
+    status_code, body, etag = cached
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if status_code == status.HTTP_200_OK and etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
+
+def query_metadata(language:str="de", metadata_id:int=1):
+    """
+    Build the metadata of a language.
+
+    Returns:
+        (status_code, metadata)
+    """
     metadata = {}
     try:
-        if not MetadataColumn.objects.filter(metadata_id=metadata_id).exists():
+        columns = list(MetadataColumn.objects.filter(metadata_id=metadata_id).select_related('metadata'))
+        if not columns:
             metadata = {
                 "error": {
                     "status_code": "not found",
@@ -85,25 +119,29 @@ def get_delivery_metadata(response: Response, language:str="de", metadata_id:int
                 }
             }
             
-            response.status_code = status.HTTP_404_NOT_FOUND
-            return metadata
+            return status.HTTP_404_NOT_FOUND, metadata
 
-        if not Language.objects.filter(code=language).exists():
+        code, language = language, Language.objects.filter(code=language).first()
+        if language is None:
             metadata["error"] = {
                 "status_code": "not found",
-                "status_description": f"language {language} not found",
-                "detail": f"language {language} not found",
+                "status_description": f"language {code} not found",
+                "detail": f"language {code} not found",
             }
         
-            response.status_code = status.HTTP_404_NOT_FOUND
-            return metadata
-
-        language = Language.objects.get(code=language)
-        columns = MetadataColumn.objects.filter(metadata_id=metadata_id).select_related('metadata').prefetch_related('localizations')
+            return status.HTTP_404_NOT_FOUND, metadata
+
+        # one query for the localizations of every column
+        localizations = {
+            localization.metadata_column_id: localization
+            for localization in MetadataLocalization.objects.filter(
+                metadata_column__metadata_id=metadata_id, language=language
+            )
+        }
 
         col = {}
         for column in columns:
-            localization = column.localizations.filter(language=language).first()
+            localization = localizations.get(column.id)
             if not localization:
                 metadata = {
                     "error": {
@@ -113,8 +151,7 @@ def get_delivery_metadata(response: Response, language:str="de", metadata_id:int
                     }
                 }
                 
-                response.status_code = status.HTTP_404_NOT_FOUND
-                return metadata
+                return status.HTTP_404_NOT_FOUND, metadata
             
             col[column.column_name] = {
                         "title": localization.title,
@@ -126,11 +163,11 @@ def get_delivery_metadata(response: Response, language:str="de", metadata_id:int
         metadata = {
             "metadata":{
                 "column": col,
-                "primary_key": Metadata.objects.get(id=metadata_id).primary_key,
+                "primary_key": columns[0].metadata.primary_key,
             }
         }
         
-        return metadata
+        return status.HTTP_200_OK, metadata
 
     except Exception as e:
         metadata = {
@@ -141,5 +178,4 @@ def get_delivery_metadata(response: Response, language:str="de", metadata_id:int
             }
         }
         
-        response.status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
-        return metadata
\ No newline at end of file
+        return status.HTTP_500_INTERNAL_SERVER_ERROR, metadata
@@ -0,0 +1,151 @@
+import os
+import re
+import time
+import mimetypes
+import django
+from fastapi import status
+from typing import Callable
+from fastapi import Request
+from fastapi import Response
+from fastapi import APIRouter
+from fastapi.responses import FileResponse, JSONResponse
+from fastapi.routing import APIRoute
+from email.utils import parsedate_to_datetime
+
+django.setup()
+from data_api.db import run_query
+from django.conf import settings
+from database.models import Video
+from common_utils.media.hls import HLS_MEDIA_TYPES
+
+# bytes read per chunk of a streamed video
+VIDEO_STREAM_CHUNK_SIZE = int(os.getenv("VIDEO_STREAM_CHUNK_SIZE", str(1024 * 1024)))
+# playlists and segments are plain file names inside the rendition directory
+HLS_FILENAME = re.compile(r"^[A-Za-z0-9_-]+\.(m3u8|m4s|ts|mp4)$")
+
+class TimedRoute(APIRoute):
+    def get_route_handler(self) -> Callable:
+        original_route_handler = super().get_route_handler()
+        async def custom_route_handler(request: Request) -> Response:
+            before = time.time()
+            response: Response = await original_route_handler(request)
+            duration = time.time() - before
+            response.headers["X-Response-Time"] = str(duration)
+            print(f"route duration: {duration}")
+            print(f"route response: {response}")
+            print(f"route response headers: {response.headers}")
+            return response
+
+        return custom_route_handler
+    
+
+router = APIRouter(
+    route_class=TimedRoute,
+)
+
+
+class VideoFileResponse(FileResponse):
+    chunk_size = VIDEO_STREAM_CHUNK_SIZE
+
+
+def not_modified(request: Request, response: FileResponse):
+    """Whether the conditional headers of a request match the file of a response, see RFC 9110 13.2.2."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # weak comparison, W/"x" matches "x"
+        tags = [tag.strip()[2:] if tag.strip().startswith("W/") else tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or response.headers["etag"] in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            return parsedate_to_datetime(response.headers["last-modified"]) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+
+    return False
+
+
+def not_found(detail:str, video_id:str):
+    return JSONResponse(
+        status_code=status.HTTP_404_NOT_FOUND,
+        content={
+            "error": {
+                "status_code": "not found",
+                "status_description": f"Video with video ID {video_id} not found",
+                "detail": detail,
+            }
+        },
+    )
+
+
+def file_response(request: Request, path:str, media_type:str, stat_result:os.stat_result):
+    """Serve a file, or a 304 Not Modified if the request already holds this version of it."""
+    response = VideoFileResponse(path, media_type=media_type, stat_result=stat_result)
+    response.headers["Cache-Control"] = "no-cache"
+    if not_modified(request, response):
+        headers = {name: response.headers[name] for name in ("etag", "last-modified", "cache-control")}
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return response
+
+
+description = """
+    Stream the file of a video.
+
+    Range requests are answered with 206 Partial Content, so players seek
+    without downloading the whole file. Responses carry an ETag and a
+    Last-Modified date, and requests sending them back in If-None-Match or
+    If-Modified-Since get a 304 Not Modified.
+"""
+
+@router.api_route(
+    "/video/{video_id}/stream", methods=["GET", "HEAD"], tags=["Video"], description=description,
+    name="stream_video",
+)
+async def stream_video(request: Request, video_id:str):
+    video = await run_query(
+        lambda: Video.objects.filter(video_id=video_id).values_list("video_file", "video_format").first()
+    )
+    path = os.path.join(settings.MEDIA_ROOT, video[0]) if video and video[0] else None
+    try:
+        stat_result = os.stat(path) if path else None
+    except FileNotFoundError:
+        stat_result = None
+
+    if stat_result is None:
+        return not_found(f"Video file of video ID {video_id} not found", video_id)
+
+    media_type = mimetypes.guess_type(path)[0] or f"video/{(video[1] or 'mp4').lower()}"
+    return file_response(request, path, media_type, stat_result)
+
+
+hls_description = """
+    Serve the HLS rendition of a video: index.m3u8, the playlist, then the
+    segments it lists. Only videos generated with VIDEO_HLS enabled have one.
+    Files are served like /video/{video_id}/stream, with Range and conditional
+    request support.
+"""
+
+@router.api_route(
+    "/video/{video_id}/hls/{filename}", methods=["GET", "HEAD"], tags=["Video"], description=hls_description,
+    name="stream_hls",
+)
+async def stream_hls(request: Request, video_id:str, filename:str):
+    if not HLS_FILENAME.match(filename):
+        return not_found(f"HLS file {filename} not found", video_id)
+
+    meta_info = await run_query(
+        lambda: Video.objects.filter(video_id=video_id).values_list("meta_info", flat=True).first()
+    )
+    playlist = (meta_info or {}).get("hls")
+    path = os.path.join(settings.MEDIA_ROOT, os.path.dirname(playlist), filename) if playlist else None
+    try:
+        stat_result = os.stat(path) if path else None
+    except FileNotFoundError:
+        stat_result = None
+
+    if stat_result is None:
+        return not_found(f"HLS file {filename} of video ID {video_id} not found", video_id)
+
+    return file_response(request, path, HLS_MEDIA_TYPES[os.path.splitext(filename)[1]], stat_result)
@@ -1,9 +1,38 @@
 import os
 import logging
 import sys
+import multiprocessing
 from common_utils.services.ros_manager import ROSManager
+from common_utils.models.ingest import image_write_buffer
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# run every topic in its own process (own ROS node, GIL and workers) instead of threads of one node
+ROS_PROCESS_PER_TOPIC = os.getenv("ROS_PROCESS_PER_TOPIC", "0").lower() in ("1", "true", "yes")
+
+def split_topics(params:dict):
+    """Topics and message types as lists, topics may be given as a comma separated string."""
+    topics = params['topics']
+    if isinstance(topics, str):
+        topics = [topic.strip() for topic in topics.split(",") if topic.strip()]
+    
+    msg_type = params["msg_type"]
+    if isinstance(msg_type, str):
+        msg_type = [msg_type] * len(topics)
+    
+    return topics, msg_type
+
+def run_topics(topics:list, msg_type:list, callback):
+    """
+    Target of the per topic processes.
+
+    A multiprocessing child leaves through os._exit, so atexit handlers never run
+    in it: the images still buffered by image_write_buffer are flushed here.
+    """
+    try:
+        ROSManager(topics, msg_type=msg_type, callback=callback)
+    finally:
+        image_write_buffer.close()
+
 def main(params:dict, callback=None):
     # define  a default callback
     def default_callback(*data):
@@ -14,11 +43,25 @@ def main(params:dict, callback=None):
     try:
         assert "topics" in params.keys(), f"key: topic not found in params"
         assert "msg_type" in params.keys(), f"key: msg_type not found in params"
+        
+        topics, msg_type = split_topics(params)
+        if ROS_PROCESS_PER_TOPIC and len(topics) > 1:
+            processes = [
+                multiprocessing.Process(
+                    target=run_topics, args=([topic], [msg_type[i]], callback), name=f"ros-{topic}",
+                )
+                for i, topic in enumerate(topics)
+            ]
+            for process in processes:
+                process.start()
+            for process in processes:
+                process.join()
+            return
 
         # Create a MultiCameraSubscriber node
         multi_camera_subscriber = ROSManager(
-            params['topics'], 
-            msg_type=params["msg_type"],
+            topics, 
+            msg_type=msg_type,
             callback=callback
             )
     
@@ -26,4 +69,4 @@ def main(params:dict, callback=None):
         logging.error(f'Error in getting data from ROS: {err}')
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,110 @@
+import os
+import grpc
+import logging
+import threading
+from itertools import count
+from data_reader.interface.grpc import data_acquisition_pb2_grpc
+
+GRPC_CHANNEL_POOL_SIZE = int(os.getenv("GRPC_CHANNEL_POOL_SIZE", "1"))
+GRPC_KEEPALIVE_MS = int(os.getenv("GRPC_KEEPALIVE_MS", "30000"))
+GRPC_TIMEOUT = float(os.getenv("GRPC_TIMEOUT", "5"))
+
+CHANNEL_OPTIONS = [
+    ('grpc.keepalive_time_ms', GRPC_KEEPALIVE_MS),
+    ('grpc.keepalive_timeout_ms', 10000),
+    ('grpc.keepalive_permit_without_calls', 1),
+    ('grpc.http2.max_pings_without_data', 0),
+    ('grpc.initial_reconnect_backoff_ms', 200),
+    ('grpc.max_reconnect_backoff_ms', 5000),
+]
+
+
+class ChannelPool:
+    """
+    Process-wide pool of long-lived gRPC channels and their stubs.
+
+    Channels are created on first use and reused for every call, round robin,
+    so frames do not pay for a new HTTP/2 connection. gRPC reconnects a channel
+    by itself; a channel is only rebuilt when a call fails with UNAVAILABLE.
+
+    Attributes:
+        target: Address of the computing unit, host:port.
+        size: Number of channels in the pool.
+    """
+    def __init__(self, target:str, size:int=GRPC_CHANNEL_POOL_SIZE):
+        self.target = target
+        self.size = max(size, 1)
+        self.channels = [None] * self.size
+        self.stubs = [None] * self.size
+        self.lock = threading.Lock()
+        self._next = count()
+
+    def _connect(self, index:int):
+        channel = grpc.insecure_channel(self.target, options=CHANNEL_OPTIONS)
+        self.channels[index] = channel
+        self.stubs[index] = data_acquisition_pb2_grpc.ComputingUnitStub(channel)
+
+    def get(self):
+        """
+        Returns:
+            The index of the channel and its ComputingUnitStub.
+        """
+        index = next(self._next) % self.size
+        if self.stubs[index] is None:
+            with self.lock:
+                if self.stubs[index] is None:
+                    self._connect(index)
+
+        return index, self.stubs[index]
+
+    def reset(self, index:int):
+        """Rebuild a channel after it became unavailable."""
+        with self.lock:
+            channel = self.channels[index]
+            logging.warning(f"gRPC channel {index} to {self.target} unavailable, reconnecting")
+            if channel is not None:
+                channel.close()
+            self._connect(index)
+
+    def call(self, method:str, request, timeout:float=GRPC_TIMEOUT):
+        """
+        Call a unary method of the ComputingUnit service.
+
+        Parameters:
+            method: Name of the rpc, e.g. ProcessData.
+            request: The request message.
+            timeout: Deadline of the call in seconds.
+
+        Returns:
+            The response message.
+        """
+        index, stub = self.get()
+        try:
+            return getattr(stub, method)(request, timeout=timeout)
+        except grpc.RpcError as err:
+            if err.code() == grpc.StatusCode.UNAVAILABLE:
+                self.reset(index)
+            raise
+
+    def close(self):
+        with self.lock:
+            for channel in self.channels:
+                if channel is not None:
+                    channel.close()
+            self.channels = [None] * self.size
+            self.stubs = [None] * self.size
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """The channel pool to the data acquisition computing unit, shared by the whole process."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ChannelPool(f'localhost:{os.environ.get("GRPC_DATA_READER")}')
+
+    return _pool
@@ -1,5 +1,4 @@
 import os
-import grpc
 import json
 import sys
 import uuid
@@ -7,15 +6,24 @@ import time
 import logging
 from datetime import datetime, timezone, timedelta
 from common_utils.models.common import save_image
+from common_utils.media.frame_buffer import put_frame, FRAME_BUFFER_ENABLED
+from common_utils.media.image_codec import decode_image, INGEST_DOWNSCALE
+from generate_video.rolling.segments import push_frame, VIDEO_ENCODER_MODE
+from common_utils.time.histogram import LatencyHistogram
+from cleanup.config.retention_config import IMAGE_RETENTION_MINUTES
 from data_reader.interface.grpc import data_acquisition_pb2
-from data_reader.interface.grpc import data_acquisition_pb2_grpc
+from data_reader.interface.grpc.channel import get_pool
+from data_reader.interface.grpc.streamer import frame_streamer
+
+GRPC_SIGNAL_MODE = os.getenv("GRPC_SIGNAL_MODE", "stream")  # stream | unary
+GRPC_LATENCY_REPORT_SECONDS = float(os.getenv("GRPC_LATENCY_REPORT_SECONDS", "60"))
+
+frame_latency = LatencyHistogram("frame", report_interval=GRPC_LATENCY_REPORT_SECONDS)
+rpc_latency = LatencyHistogram("ProcessData rpc", report_interval=GRPC_LATENCY_REPORT_SECONDS)
 
 def run(payload):
     try:
-        with grpc.insecure_channel(f'localhost:{os.environ.get("GRPC_DATA_READER")}') as channel:
-            start_time = time.time()
-            stub = data_acquisition_pb2_grpc.ComputingUnitStub(channel)
-            
+        with frame_latency.time():
             assert isinstance(payload, dict), f"payload are expected to be dict, but got {type(payload)}"
             assert 'cv_image' in payload.keys(), f"key: cv_image not found in payload"
             assert 'img_key' in payload.keys(), f"key: img_key not found in payload"
@@ -25,29 +33,43 @@ def run(payload):
                 return
             
             cv_image = payload["cv_image"]
+            image_bytes = payload.get("image_bytes")
             img_key = payload["img_key"]
             set_name = payload["set_name"]
-            dt = datetime.now(tz=timezone.utc)
+            # the time the message was received, not the time a worker got to it
+            dt = payload.get("received_at") or datetime.now(tz=timezone.utc)
             
             save_image(
                 cv_image=cv_image,
+                image_bytes=image_bytes,
                 image_id=img_key,
                 image_name=f"{payload['filename']}",
                 image_format=os.path.basename(payload['filename']).split('.')[-1],
                 timestamp=dt,
-                expires_at=(dt + timedelta(minutes=15)),
+                expires_at=(dt + timedelta(minutes=IMAGE_RETENTION_MINUTES)),
                 source=set_name,
             )
             
-            signal = {key: value for key, value in payload.items() if key!='cv_image'}
+            # passthrough frames are only decoded, downscaled in the DCT domain, when a buffer needs them
+            if cv_image is None and (FRAME_BUFFER_ENABLED or VIDEO_ENCODER_MODE == "rolling"):
+                cv_image = decode_image(image_bytes, INGEST_DOWNSCALE)
+            
+            if cv_image is not None:
+                put_frame(set_name, cv_image, img_key=img_key, timestamp=dt)
+                push_frame(set_name, cv_image, timestamp=dt)
+            
+            if GRPC_SIGNAL_MODE == "stream":
+                # batched over a client stream, does not wait for the computing unit
+                frame_streamer.send(payload)
+                return
+            
+            signal = {key: value for key, value in payload.items() if key not in ('cv_image', 'image_bytes', 'received_at')}
             
             data = json.dumps(signal)
-            response = stub.ProcessData(data_acquisition_pb2.ProcessDataRequest(data=data))
-            response_data = json.loads(response.result)        
-            exectution_time = time.time() - start_time
-
-            print(f"Execution Time: {int(exectution_time * 1000)} milliseconds!")
-            print("Data Acquisition Computing Service responded with updated data:", response_data)
+            with rpc_latency.time():
+                response = get_pool().call("ProcessData", data_acquisition_pb2.ProcessDataRequest(data=data))
+            response_data = json.loads(response.result)
+            logging.debug(f"Data Acquisition Computing Service responded with updated data: {response_data}")
             
     except Exception as err:
         logging.error(f"Error while reading and processing data in data acquisition: {err}")
\ No newline at end of file
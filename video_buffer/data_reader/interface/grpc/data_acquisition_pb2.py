@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x16\x64\x61ta_acquisition.proto\x12\x10\x64\x61ta_acquisition\"\"\n\x12ProcessDataRequest\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\t\"%\n\x13ProcessDataResponse\x12\x0e\n\x06result\x18\x01 \x01(\t2m\n\rComputingUnit\x12\\\n\x0bProcessData\x12$.data_acquisition.ProcessDataRequest\x1a%.data_acquisition.ProcessDataResponse\"\x00\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x16\x64\x61ta_acquisition.proto\x12\x10\x64\x61ta_acquisition\"\"\n\x12ProcessDataRequest\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\t\"%\n\x13ProcessDataResponse\x12\x0e\n\x06result\x18\x01 \x01(\t\"\x85\x01\n\x0b\x46rameSignal\x12\x0f\n\x07img_key\x18\x01 \x01(\t\x12\x10\n\x08set_name\x18\x02 \x01(\t\x12\x11\n\ttimestamp\x18\x03 \x01(\t\x12\x10\n\x08\x66ilename\x18\x04 \x01(\t\x12\x10\n\x08\x64\x61tetime\x18\x05 \x01(\t\x12\x12\n\x05\x66rame\x18\x06 \x01(\x0cH\x00\x88\x01\x01\x42\x08\n\x06_frame\":\n\x15ProcessFramesResponse\x12\x10\n\x08received\x18\x01 \x01(\x05\x12\x0f\n\x07\x62\x61tches\x18\x02 \x01(\x05\x32\xca\x01\n\rComputingUnit\x12\\\n\x0bProcessData\x12$.data_acquisition.ProcessDataRequest\x1a%.data_acquisition.ProcessDataResponse\"\x00\x12[\n\rProcessFrames\x12\x1d.data_acquisition.FrameSignal\x1a\'.data_acquisition.ProcessFramesResponse\"\x00(\x01\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -35,6 +35,10 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_PROCESSDATAREQUEST']._serialized_end=78
   _globals['_PROCESSDATARESPONSE']._serialized_start=80
   _globals['_PROCESSDATARESPONSE']._serialized_end=117
-  _globals['_COMPUTINGUNIT']._serialized_start=119
-  _globals['_COMPUTINGUNIT']._serialized_end=228
+  _globals['_FRAMESIGNAL']._serialized_start=120
+  _globals['_FRAMESIGNAL']._serialized_end=253
+  _globals['_PROCESSFRAMESRESPONSE']._serialized_start=255
+  _globals['_PROCESSFRAMESRESPONSE']._serialized_end=313
+  _globals['_COMPUTINGUNIT']._serialized_start=316
+  _globals['_COMPUTINGUNIT']._serialized_end=518
 # @@protoc_insertion_point(module_scope)
@@ -39,6 +39,11 @@ class ComputingUnitStub(object):
                 request_serializer=data__acquisition__pb2.ProcessDataRequest.SerializeToString,
                 response_deserializer=data__acquisition__pb2.ProcessDataResponse.FromString,
                 _registered_method=True)
+        self.ProcessFrames = channel.stream_unary(
+                '/data_acquisition.ComputingUnit/ProcessFrames',
+                request_serializer=data__acquisition__pb2.FrameSignal.SerializeToString,
+                response_deserializer=data__acquisition__pb2.ProcessFramesResponse.FromString,
+                _registered_method=True)
 
 
 class ComputingUnitServicer(object):
@@ -50,6 +55,12 @@ class ComputingUnitServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def ProcessFrames(self, request_iterator, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_ComputingUnitServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -58,6 +69,11 @@ def add_ComputingUnitServicer_to_server(servicer, server):
                     request_deserializer=data__acquisition__pb2.ProcessDataRequest.FromString,
                     response_serializer=data__acquisition__pb2.ProcessDataResponse.SerializeToString,
             ),
+            'ProcessFrames': grpc.stream_unary_rpc_method_handler(
+                    servicer.ProcessFrames,
+                    request_deserializer=data__acquisition__pb2.FrameSignal.FromString,
+                    response_serializer=data__acquisition__pb2.ProcessFramesResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'data_acquisition.ComputingUnit', rpc_method_handlers)
@@ -95,3 +111,30 @@ class ComputingUnit(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def ProcessFrames(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(
+            request_iterator,
+            target,
+            '/data_acquisition.ComputingUnit/ProcessFrames',
+            data__acquisition__pb2.FrameSignal.SerializeToString,
+            data__acquisition__pb2.ProcessFramesResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
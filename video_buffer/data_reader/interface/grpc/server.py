@@ -5,11 +5,16 @@ import sys
 import grpc
 import json
 import time
+import logging
 from concurrent import futures
 
 from data_reader.interface.grpc import data_acquisition_pb2
 from data_reader.interface.grpc import data_acquisition_pb2_grpc
 
+GRPC_BATCH_SIZE = int(os.getenv("GRPC_BATCH_SIZE", "25"))
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
 class ServiceImpl(data_acquisition_pb2_grpc.ComputingUnitServicer):
     def ProcessData(self, request, context):
         print(f"Receiving Request: {request.data}")
@@ -18,6 +23,29 @@ class ServiceImpl(data_acquisition_pb2_grpc.ComputingUnitServicer):
         result = json.dumps(data)
         return data_acquisition_pb2.ProcessDataResponse(result=result)
     
+    def ProcessFrames(self, request_iterator, context):
+        received, batches = 0, 0
+        batch = []
+        for signal in request_iterator:
+            batch.append(signal)
+            if len(batch) >= GRPC_BATCH_SIZE:
+                self.process_batch(batch)
+                received, batches, batch = received + len(batch), batches + 1, []
+        
+        if batch:
+            self.process_batch(batch)
+            received, batches = received + len(batch), batches + 1
+        
+        return data_acquisition_pb2.ProcessFramesResponse(received=received, batches=batches)
+    
+    def process_batch(self, signals):
+        sources = sorted({signal.set_name for signal in signals})
+        n_frames = sum(1 for signal in signals if signal.HasField("frame"))
+        logging.info(
+            f"Receiving {len(signals)} frame signals from {sources}: "
+            f"{signals[0].img_key} to {signals[-1].img_key}, {n_frames} with frame"
+        )
+    
 def serve():
     server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
     data_acquisition_pb2_grpc.add_ComputingUnitServicer_to_server(ServiceImpl(), server)
@@ -0,0 +1,104 @@
+import os
+import cv2
+import time
+import queue
+import logging
+import threading
+from typing import Optional
+from data_reader.interface.grpc import data_acquisition_pb2
+from data_reader.interface.grpc.channel import get_pool, GRPC_TIMEOUT
+
+GRPC_STREAM_MAX_FRAMES = int(os.getenv("GRPC_STREAM_MAX_FRAMES", "100"))
+GRPC_STREAM_MAX_SECONDS = float(os.getenv("GRPC_STREAM_MAX_SECONDS", "5"))
+GRPC_STREAM_QUEUE_SIZE = int(os.getenv("GRPC_STREAM_QUEUE_SIZE", "1000"))
+GRPC_SEND_FRAMES = os.getenv("GRPC_SEND_FRAMES", "0").lower() in ("1", "true", "yes")
+
+
+def frame_signal(payload:dict, frame:Optional[bytes]=None):
+    """Build the typed FrameSignal of a payload produced by the ROS callback."""
+    signal = data_acquisition_pb2.FrameSignal(
+        img_key=str(payload["img_key"]),
+        set_name=str(payload["set_name"]),
+        timestamp=str(payload.get("timestamp", "")),
+        filename=str(payload.get("filename", "")),
+        datetime=str(payload.get("datetime", "")),
+    )
+    if frame is not None:
+        signal.frame = frame
+
+    return signal
+
+
+class FrameStreamer:
+    """
+    Sends frame signals to the computing unit over client-streaming ProcessFrames calls.
+
+    Signals are queued by the ingest thread and written by a background thread to
+    an open stream. A stream is closed, and its batch acknowledged by the server,
+    after max_frames signals or max_seconds, whichever comes first; the next
+    stream is opened with the next signal. When the queue is full the signal is
+    dropped rather than blocking ingestion.
+
+    Attributes:
+        max_frames: Maximum number of signals in one stream.
+        max_seconds: Maximum lifetime of one stream.
+        send_frames: Whether to attach the encoded frame to the signals, as received in passthrough mode.
+        dropped: Number of signals dropped because the queue was full.
+    """
+    def __init__(self, max_frames:int=GRPC_STREAM_MAX_FRAMES, max_seconds:float=GRPC_STREAM_MAX_SECONDS,
+                 queue_size:int=GRPC_STREAM_QUEUE_SIZE, send_frames:bool=GRPC_SEND_FRAMES):
+        self.max_frames = max(max_frames, 1)
+        self.max_seconds = max_seconds
+        self.send_frames = send_frames
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.thread = None
+        self.lock = threading.Lock()
+        self.dropped = 0
+
+    def send(self, payload:dict):
+        if self.thread is None:
+            with self.lock:
+                if self.thread is None:
+                    self.thread = threading.Thread(target=self._run, name="frame-streamer", daemon=True)
+                    self.thread.start()
+
+        frame = None
+        if self.send_frames and payload.get("image_bytes") is not None:
+            frame = payload["image_bytes"]
+        elif self.send_frames and payload.get("cv_image") is not None:
+            ok, buffer = cv2.imencode(".jpg", payload["cv_image"])
+            frame = buffer.tobytes() if ok else None
+
+        try:
+            self.queue.put_nowait(frame_signal(payload, frame))
+        except queue.Full:
+            self.dropped += 1
+            if self.dropped % 100 == 1:
+                logging.warning(f"Frame signal queue full, {self.dropped} signals dropped so far")
+
+    def _batch(self, first):
+        yield first
+        deadline = time.monotonic() + self.max_seconds
+        for _ in range(self.max_frames - 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                yield self.queue.get(timeout=remaining)
+            except queue.Empty:
+                return
+
+    def _run(self):
+        while True:
+            # only open a stream once there is something to send
+            first = self.queue.get()
+            try:
+                response = get_pool().call(
+                    "ProcessFrames", self._batch(first), timeout=self.max_seconds + GRPC_TIMEOUT,
+                )
+                logging.debug(f"Computing unit acknowledged {response.received} frames in {response.batches} batches")
+            except Exception as err:
+                logging.error(f"Error while streaming frame signals to data acquisition: {err}")
+
+
+frame_streamer = FrameStreamer()
@@ -1,3 +1,4 @@
+import os
 import logging
 from data_reader.interface.grpc import client
 # from data_reader.endpoints.ros2 import core as ros2_core
@@ -11,7 +12,8 @@ mapping = {
 
 params = {
     "mode": "ros",
-    "topics": '/sensor_raw/rgbmatrix_01/image_raw/compressed',
+    # comma separated, one camera per topic
+    "topics": os.getenv("ROS_TOPICS", '/sensor_raw/rgbmatrix_01/image_raw/compressed'),
     "msg_type": "compressed_image",
 }
 
@@ -23,7 +23,7 @@ class VideoAdmin(admin.ModelAdmin):
     search_fields = ('video_id', 'video_name')
     list_filter = ('created_at', 'expires_at')
     readonly_fields = ('created_at',)
-    fields = ('video_id', 'video_name', 'video_file', 'start_time', 'end_time', 'duration', 'meta_info', 'timestamp', 'expires_at')
+    fields = ('video_id', 'video_name', 'video_file', 'start_time', 'end_time', 'duration', 'frame_count', 'width', 'height', 'meta_info', 'timestamp', 'expires_at')
     ordering = ('-created_at',)
 
     def show_video_size(self, obj):
@@ -1,33 +1,46 @@
-import os
 from django.core.management.base import BaseCommand
 from django.utils import timezone
-from database.models import Image, Video
+from common_utils.models.cleanup import (
+    cleanup_expired, CLEANUP_CHUNK_SIZE, CLEANUP_WORKERS, CLEANUP_TIME_BUDGET, CLEANUP_MODE
+)
 
 class Command(BaseCommand):
     help = 'Cleans up expired images and videos from storage and database'
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=CLEANUP_CHUNK_SIZE, help='rows deleted per query')
+        parser.add_argument('--workers', type=int, default=CLEANUP_WORKERS, help='threads deleting files')
+        parser.add_argument('--time-budget', type=float, default=CLEANUP_TIME_BUDGET, 
+                            help='seconds after which no new chunk is started, 0 for no budget')
+        parser.add_argument('--mode', choices=['buckets', 'rows'], default=CLEANUP_MODE, 
+                            help='drop whole expired image directories first, or only delete row by row')
+
+    def handle(self, *args, **options):
         # Get current time
         now = timezone.now()
         now_str = now.strftime("%Y-%m-%d %H:%M:%S")
         
-        # Clean up expired images
-        expired_images = Image.objects.filter(expires_at__lte=now)
-        image_count = expired_images.count()
-        for image in expired_images:
-            if os.path.exists(image.image_file.path):
-                self.stdout.write(f"{now_str}: Deleting image file: {image.image_file.path}")
-                os.remove(image.image_file.path)  # Delete the file from storage
-            image.delete()  # Remove the record from the database
-
-        # Clean up expired videos
-        expired_videos = Video.objects.filter(expires_at__lte=now)
-        video_count = expired_videos.count()
-        for video in expired_videos:
-            if os.path.exists(video.video_file.path):
-                self.stdout.write(f"{now_str}: Deleting video file: {video.video_file.path}")
-                os.remove(video.video_file.path)  # Delete the file from storage
-            video.delete()  # Remove the record from the database
-
+        results = cleanup_expired(
+            now=now, 
+            chunk_size=options['chunk_size'], 
+            workers=options['workers'], 
+            time_budget=options['time_budget'],
+            mode=options['mode'],
+        )
+        
+        images, videos = results['images'], results['videos']
+        reclaimed = (images['bytes'] + videos['bytes']) / 1024 ** 2
+        done = images['done'] and videos['done']
+        if 'buckets' in results:
+            buckets = results['buckets']
+            reclaimed += buckets['bytes'] / 1024 ** 2
+            done = done and buckets['done']
+            self.stdout.write(f"{now_str}: Dropped {buckets['buckets']} expired image buckets with {buckets['rows']} images.")
+        
         # Output the result
-        self.stdout.write(self.style.SUCCESS(f"{now_str}: Deleted {image_count} expired images and {video_count} expired videos."))
+        self.stdout.write(self.style.SUCCESS(
+            f"{now_str}: Deleted {images['rows']} expired images and {videos['rows']} expired videos, "
+            f"{reclaimed:.1f} MB reclaimed in {results['seconds']}s."
+        ))
+        if not done:
+            self.stdout.write(self.style.WARNING(f"{now_str}: Time budget exhausted, the rest is left for the next run."))
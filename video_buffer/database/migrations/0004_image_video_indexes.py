@@ -0,0 +1,33 @@
+# Generated by Django 4.2 on 2026-10-18 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0003_video_frame_count_video_height_video_width'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['timestamp'], name='image_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['source', 'timestamp'], name='image_source_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['expires_at'], name='image_expires_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='video',
+            index=models.Index(fields=['created_at'], name='video_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='video',
+            index=models.Index(fields=['expires_at'], name='video_expires_at_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 10:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('database', '0004_image_video_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='video',
+            name='hls_size',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
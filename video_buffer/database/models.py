@@ -1,7 +1,9 @@
 from django.db import models
+from common_utils.media.paths import bucket_dir
 
 def get_image_path(instance, filename):
-    return f"images/{filename}"
+    # images/<source>/<YYYY-MM-DD>/<HH>/<MM>/<filename>
+    return f"{bucket_dir(instance.source, instance.timestamp)}/{filename}"
 
 def get_media_path(instance, filename):
     return f"videos/{filename}"
@@ -24,6 +26,11 @@ class Image(models.Model):
         db_table = 'image'
         verbose_name = 'Image'
         verbose_name_plural = "Images"
+        indexes = [
+            models.Index(fields=['timestamp'], name='image_timestamp_idx'),
+            models.Index(fields=['source', 'timestamp'], name='image_source_timestamp_idx'),
+            models.Index(fields=['expires_at'], name='image_expires_at_idx'),
+        ]
 
     def __str__(self) -> str:
         return f"Image: {self.image_id} created at {self.created_at}"
@@ -34,12 +41,16 @@ class Video(models.Model):
     video_name = models.CharField(max_length=255)
     video_file = models.FileField(upload_to='videos/')  # Changed to FileField for videos
     video_size = models.IntegerField(null=True, blank=True)  # Size in bytes
+    hls_size = models.IntegerField(null=True, blank=True)  # Size in bytes of the HLS rendition, if any
     video_format = models.CharField(max_length=50, null=True, blank=True)  # MP4, AVI, etc.
     timestamp = models.DateTimeField()  # Time when video generation started
     created_at = models.DateTimeField(auto_now_add=True)
     start_time = models.DateTimeField(null=True, blank=True)  # Start time of the video content
     end_time = models.DateTimeField(null=True, blank=True)  # End time of the video content
     duration = models.DurationField(null=True, blank=True)  # Duration of the video
+    frame_count = models.IntegerField(null=True, blank=True)  # Number of encoded frames
+    width = models.IntegerField(null=True, blank=True)  # Frame width in pixels
+    height = models.IntegerField(null=True, blank=True)  # Frame height in pixels
     meta_info = models.JSONField(null=True, blank=True)
     expires_at = models.DateTimeField(null=True, blank=True)  # Expiration time for cleanup
 
@@ -47,6 +58,10 @@ class Video(models.Model):
         db_table = 'video'
         verbose_name = 'Video'
         verbose_name_plural = "Videos"
+        indexes = [
+            models.Index(fields=['created_at'], name='video_created_at_idx'),
+            models.Index(fields=['expires_at'], name='video_expires_at_idx'),
+        ]
 
     def __str__(self) -> str:
         return f"Video: {self.video_id} created at {self.created_at}"
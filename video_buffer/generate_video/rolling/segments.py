@@ -0,0 +1,287 @@
+import os
+import re
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List
+from common_utils.media.frame_loader import annotate_frame, timestamp_legend
+from common_utils.media.video_utils import create_video_from_frames, prepare_frame
+from common_utils.media.paths import source_slug
+from common_utils.media.hls import VIDEO_HLS, VIDEO_HLS_SEGMENT_SECONDS
+
+VIDEO_ENCODER_MODE = os.getenv("VIDEO_ENCODER_MODE", "batch")  # batch | rolling
+VIDEO_FRAMERATE = int(os.getenv("VIDEO_FRAMERATE", "5"))
+VIDEO_SEGMENT_SECONDS = int(os.getenv("VIDEO_SEGMENT_SECONDS", "10"))
+VIDEO_SEGMENT_DIR = os.getenv("VIDEO_SEGMENT_DIR", "/media/segments")
+VIDEO_SEGMENT_GRACE_SECONDS = 2
+# segments, and .part files of encoders that died, are removed by the cleanup task once this old
+VIDEO_SEGMENT_RETENTION_MINUTES = int(os.getenv("VIDEO_SEGMENT_RETENTION_MINUTES", "15"))
+
+# <start_ms>_<end_ms>_<frames>_<width>x<height>[_<piece>].mp4, written as <start_ms>_<piece>.part while encoding,
+# an interval is split in pieces when the frame size changes within it
+SEGMENT_PATTERN = re.compile(
+    r"^(?P<start>\d+)_(?P<end>\d+)_(?P<frames>\d+)_(?P<width>\d+)x(?P<height>\d+)(?:_(?P<piece>\d+))?\.mp4$"
+)
+# fragmented MP4, whatever was written so far stays readable if the encoder dies
+SEGMENT_OUTPUT_ARGS = ['-f', 'mp4', '-movflags', '+frag_keyframe+empty_moov+default_base_moof']
+
+
+class Segment:
+    """
+    A finished segment on disk.
+
+    Attributes:
+        path: Path of the fragmented MP4 file.
+        start_time: Start of the segment interval.
+        end_time: End of the segment interval.
+        frames: Number of frames in the segment.
+        width: Frame width.
+        height: Frame height.
+        piece: Index of the segment within its interval, see SegmentWriter.
+    """
+    def __init__(self, path:str, start_ms:int, end_ms:int, frames:int, width:int, height:int, piece:int=0):
+        self.path = path
+        self.start_time = datetime.fromtimestamp(start_ms / 1000, tz=timezone.utc)
+        self.end_time = datetime.fromtimestamp(end_ms / 1000, tz=timezone.utc)
+        self.frames = frames
+        self.width = width
+        self.height = height
+        self.piece = piece
+
+
+class SegmentWriter:
+    """
+    Encodes the frames of one camera topic into consecutive fixed-length segments.
+
+    Segments are aligned on multiples of VIDEO_SEGMENT_SECONDS of frame time. Each
+    one is its own ffmpeg process encoding in the background while frames are piped
+    in; a segment is renamed to its final name once ffmpeg has finished it.
+
+    Frames older than the current segment, or belonging to a segment already
+    closed, arrive too late: their segment may be finalized already, they are
+    dropped rather than reopening it.
+
+    Attributes:
+        late: Number of frames dropped for arriving after their segment.
+    """
+    def __init__(self, source:str, segment_dir:str=VIDEO_SEGMENT_DIR, segment_seconds:int=VIDEO_SEGMENT_SECONDS,
+                 framerate:int=VIDEO_FRAMERATE):
+        self.source = source
+        self.directory = os.path.join(segment_dir, source_slug(source))
+        self.segment_ms = segment_seconds * 1000
+        self.framerate = framerate
+        self.lock = threading.Lock()
+        self.process = None
+        self.start_ms = None
+        self.frames = 0
+        self.size = None
+        self.piece = 0
+        self.late = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def write(self, frame, timestamp:datetime):
+        start_ms = int(timestamp.timestamp() * 1000) // self.segment_ms * self.segment_ms
+        size = (frame.shape[1], frame.shape[0])
+        with self.lock:
+            closed = self.process is None and start_ms == self.start_ms
+            if self.start_ms is not None and (start_ms < self.start_ms or closed):
+                self.late += 1
+                if self.late % 100 == 1:
+                    logging.warning(f"Frame of {self.source} at {timestamp} arrived after its segment, {self.late} dropped so far")
+                return
+
+            if self.process is not None and (start_ms != self.start_ms or size != self.size):
+                self._close()
+
+            if self.process is None:
+                # a new piece of the same interval when only the frame size changed
+                self.piece = self.piece + 1 if start_ms == self.start_ms else 0
+                self.start_ms, self.size, self.frames = start_ms, size, 0
+                self.process = create_video_from_frames(
+                    self._part_path(), width=size[0], height=size[1], framerate=self.framerate, output_args=SEGMENT_OUTPUT_ARGS,
+                    keyframe_seconds=VIDEO_HLS_SEGMENT_SECONDS if VIDEO_HLS else None,
+                )
+
+            frame = annotate_frame(frame.copy(), timestamp_legend(timestamp))
+            self.process.stdin.write(prepare_frame(frame, size))
+            self.frames += 1
+
+    def close_if_due(self, now_ms:int):
+        """Close the open segment once its interval is over, so it does not wait for the next frame."""
+        with self.lock:
+            if self.process is not None and now_ms >= self.start_ms + self.segment_ms + VIDEO_SEGMENT_GRACE_SECONDS * 1000:
+                self._close()
+
+    def _part_path(self):
+        return os.path.join(self.directory, f"{self.start_ms}_{self.piece}.part")
+
+    def _close(self):
+        process, part_path = self.process, self._part_path()
+        name = f"{self.start_ms}_{self.start_ms + self.segment_ms}_{self.frames}_{self.size[0]}x{self.size[1]}"
+        name += f"_{self.piece}.mp4" if self.piece else ".mp4"
+        self.process = None
+        threading.Thread(
+            target=self._finalize, args=(process, part_path, os.path.join(self.directory, name)), daemon=True,
+        ).start()
+
+    @staticmethod
+    def _finalize(process, part_path, path):
+        try:
+            process.stdin.close()
+            process.wait()
+            if process.returncode == 0:
+                os.rename(part_path, path)
+            else:
+                logging.error(f"Error encoding segment {part_path}: ffmpeg exited with {process.returncode}")
+                os.remove(part_path)
+        except Exception as err:
+            logging.error(f"Error finalizing segment {part_path}: {err}")
+
+
+class RollingEncoder:
+    """
+    Continuously encodes incoming frames into segments, one SegmentWriter per camera topic.
+    """
+    def __init__(self):
+        self.writers: Dict[str, SegmentWriter] = {}
+        self.lock = threading.Lock()
+        self.watcher = None
+
+    def push(self, source:str, frame, timestamp:datetime):
+        try:
+            if source not in self.writers:
+                with self.lock:
+                    if source not in self.writers:
+                        self.writers[source] = SegmentWriter(source)
+                    if self.watcher is None:
+                        self.watcher = threading.Thread(target=self._watch, daemon=True)
+                        self.watcher.start()
+
+            self.writers[source].write(frame, timestamp)
+        except Exception as err:
+            logging.error(f"Error encoding frame of {source} into segment: {err}")
+
+    def _watch(self):
+        while True:
+            time.sleep(1)
+            now_ms = int(time.time() * 1000)
+            for writer in list(self.writers.values()):
+                writer.close_if_due(now_ms)
+
+
+rolling_encoder = RollingEncoder()
+
+
+def push_frame(source:str, frame, timestamp:datetime):
+    """Hand an ingested frame to the rolling encoder, if the rolling mode is enabled."""
+    if VIDEO_ENCODER_MODE == "rolling":
+        rolling_encoder.push(source, frame, timestamp)
+
+
+def list_segments(from_time:datetime, to_time:datetime, segment_dir:str=VIDEO_SEGMENT_DIR):
+    """
+    List the finished segments starting in [from_time, to_time), per topic directory.
+
+    Returns:
+        A dict mapping the topic directory name to its segments, oldest first.
+    """
+    start_ms, end_ms = int(from_time.timestamp() * 1000), int(to_time.timestamp() * 1000)
+    segments: Dict[str, List[Segment]] = {}
+    if not os.path.isdir(segment_dir):
+        return segments
+
+    for slug in sorted(os.listdir(segment_dir)):
+        directory = os.path.join(segment_dir, slug)
+        if not os.path.isdir(directory):
+            continue
+
+        found = []
+        for name in os.listdir(directory):
+            match = SEGMENT_PATTERN.match(name)
+            if match and start_ms <= int(match["start"]) < end_ms:
+                found.append(Segment(os.path.join(directory, name), *(int(v or 0) for v in match.groups())))
+
+        if found:
+            segments[slug] = sorted(found, key=lambda segment: (segment.start_time, segment.piece))
+
+    return segments
+
+
+def split_by_size(segments:List[Segment]):
+    """
+    Split consecutive segments into runs of the same frame size, which can be concatenated without re-encoding.
+
+    Returns:
+        The runs, in order.
+    """
+    runs: List[List[Segment]] = []
+    for segment in segments:
+        if runs and (runs[-1][-1].width, runs[-1][-1].height) == (segment.width, segment.height):
+            runs[-1].append(segment)
+        else:
+            runs.append([segment])
+
+    return runs
+
+
+def wait_for_segments(from_time:datetime, to_time:datetime, timeout:float=VIDEO_SEGMENT_SECONDS + VIDEO_SEGMENT_GRACE_SECONDS,
+                      segment_dir:str=VIDEO_SEGMENT_DIR):
+    """
+    Wait until no segment starting in [from_time, to_time) is still being encoded.
+
+    .part files outside of the window, such as the ones left by an encoder that
+    died, are not waited on, see prune_segments.
+
+    Returns:
+        True if all of them are finished, False on timeout.
+    """
+    start_ms, end_ms = int(from_time.timestamp() * 1000), int(to_time.timestamp() * 1000)
+    deadline = time.time() + timeout
+    while True:
+        pending = [
+            name
+            for slug in (os.listdir(segment_dir) if os.path.isdir(segment_dir) else [])
+            if os.path.isdir(os.path.join(segment_dir, slug))
+            for name in os.listdir(os.path.join(segment_dir, slug))
+            if name.endswith(".part") and start_ms <= int(name.split(".")[0].split("_")[0]) < end_ms
+        ]
+        if not pending:
+            return True
+        if time.time() > deadline:
+            return False
+        time.sleep(0.5)
+
+
+def prune_segments(before:datetime, segment_dir:str=VIDEO_SEGMENT_DIR):
+    """
+    Remove finished segments that ended before the given time, and .part files
+    last written before it, which no encoder is writing anymore.
+
+    Returns:
+        The number of files removed.
+    """
+    before_ms = int(before.timestamp() * 1000)
+    removed = 0
+    if not os.path.isdir(segment_dir):
+        return removed
+
+    for slug in os.listdir(segment_dir):
+        directory = os.path.join(segment_dir, slug)
+        if not os.path.isdir(directory):
+            continue
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            match = SEGMENT_PATTERN.match(name)
+            try:
+                if match and int(match["end"]) <= before_ms:
+                    os.remove(path)
+                    removed += 1
+                elif name.endswith(".part") and os.path.getmtime(path) * 1000 <= before_ms:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                # finished or removed in the meantime
+                continue
+
+    return removed
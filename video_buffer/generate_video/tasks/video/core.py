@@ -11,89 +11,182 @@ from celery import Celery
 from celery import shared_task
 from datetime import datetime, timedelta, timezone
 from common_utils.media.video_utils import generate_video as gen_video
-from common_utils.media.video_utils import get_video_length
-from common_utils.annotate.core import Annotator
-from common_utils.models.common import get_images, get_video, generate_unique_id
+from common_utils.media.video_utils import concat_videos, video_metadata, verify_metadata
+from common_utils.media.frame_loader import iter_frames, timestamp_legend, VIDEO_TARGET_WIDTH
+from common_utils.media.paths import source_slug
+from common_utils.media.hls import VIDEO_HLS, VIDEO_HLS_SEGMENT_SECONDS, remux_hls, dir_size
+from common_utils.models.common import get_images, get_sources, iter_images, get_video, generate_unique_id
 from database.models import get_media_path
+from generate_video.rolling.segments import (
+    VIDEO_ENCODER_MODE, VIDEO_FRAMERATE, VIDEO_SEGMENT_SECONDS, list_segments, wait_for_segments, split_by_size,
+)
+from cleanup.config.retention_config import VIDEO_RETENTION_HOURS
 from django.conf import settings
 
-DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+VIDEO_VERIFY_METADATA = os.getenv("VIDEO_VERIFY_METADATA", "0").lower() in ("1", "true", "yes")
 
-@shared_task(bind=True,autoretry_for=(Exception,), retry_backoff=True, retry_kwargs={"max_retries": 5}, ignore_result=True,
-             name='generate_video.tasks.video.core.generate_video')
-def generate_video(self, **kwargs):
-    try:
-        now = datetime.now(tz=timezone.utc)
-        from_time = now - timedelta(minutes=5)
-        to_time = now
-        
-        images = get_images(
-            from_time=from_time, to_time=to_time
+def create_video_model(video_name, from_time, to_time):
+    video_model = get_video(
+        video_id=str(generate_unique_id()),
+        video_name=video_name,
+        timestamp=datetime.now(tz=timezone.utc),
+        from_time=from_time,
+        to_time=to_time,
+        expires_at=(datetime.now(tz=timezone.utc) + timedelta(hours=VIDEO_RETENTION_HOURS)).replace(tzinfo=timezone.utc), 
+    )
+    
+    video_file = get_media_path(video_model, video_name)
+    if not os.path.exists(
+        os.path.dirname(
+            f"{settings.MEDIA_ROOT}/{video_file}"
         )
-        
-        if len(images) < 100:
-            data = {
-                "action": "ignored",
-                "time": datetime.now().strftime("%Y-%m-%d %H-%M-%S"),
-                "results": f"Not enough images: {len(images)}"
-            }
-            
-            return data
-        
-        frames = []
-        for image in images:
-            timestamp_str = (image.timestamp + timedelta(hours=2)).strftime(DATETIME_FORMAT)
-            annotator = Annotator(
-                    im=cv2.imread(image.image_file.path)
-                )
-            annotator.add_legend(
-                    legend_text=timestamp_str, font=1, font_scale=1.5, font_thickness=1,
-                )
-            frames.append(
-                annotator.im.data
-            )
-            
-        video_name = f"gml_tor06_{from_time.strftime('%Y-%m-%d_%H-%M-%S')}_{to_time.strftime('%Y-%m-%d_%H-%M-%S')}.mp4"
-        # video_path = f"{settings.MEDIA_ROOT}/{}"
-        
-        video_model = get_video(
-            video_id=str(generate_unique_id()),
-            video_name=video_name,
-            timestamp=datetime.now(tz=timezone.utc),
-            from_time=from_time,
-            to_time=to_time,
-            expires_at=(datetime.now(tz=timezone.utc) + timedelta(hours=14)).replace(tzinfo=timezone.utc), 
-        )
-        
-        video_file = get_media_path(video_model, video_name)
-        if not os.path.exists(
+    ):
+        os.makedirs(
             os.path.dirname(
                 f"{settings.MEDIA_ROOT}/{video_file}"
             )
-        ):
-            os.makedirs(
-                os.path.dirname(
-                    f"{settings.MEDIA_ROOT}/{video_file}"
-                )
-            )
-            
-        gen_video(
-            frames=frames,
-            video_path=f"{settings.MEDIA_ROOT}/{video_file}",
-            framerate=5,
         )
+    
+    return video_model, video_file
+
+def save_video_model(video_model, video_file, metadata):
+    # metadata is computed while encoding, ffprobe is only run to cross-check it
+    if VIDEO_VERIFY_METADATA:
+        verify_metadata(f"{settings.MEDIA_ROOT}/{video_file}", metadata)
+    
+    video_model.video_size = metadata["video_size"]
+    video_model.duration = metadata["duration"]
+    video_model.frame_count = metadata["frame_count"]
+    video_model.width = metadata["width"]
+    video_model.height = metadata["height"]
+    video_model.video_file = video_file
+    if VIDEO_HLS:
+        # a failed remux leaves the MP4 as the only rendition
+        playlist = remux_hls(f"{settings.MEDIA_ROOT}/{video_file}")
+        if playlist:
+            video_model.meta_info = dict(video_model.meta_info or {}, hls=os.path.relpath(playlist, settings.MEDIA_ROOT))
+            video_model.hls_size = dir_size(os.path.dirname(playlist))
+    video_model.save()
+
+def encode_window(from_time, to_time):
+    # one video per camera, as in rolling mode
+    sources = get_sources(from_time, to_time)
+    results = [
+        encode_source(source, from_time, to_time, multiple_sources=len(sources) > 1)
+        for source in sources
+    ]
+    data = {
+        "action": "done" if sources else "ignored",
+        "time": datetime.now().strftime("%Y-%m-%d %H-%M-%S"),
+        "results": results,
+    }
+    
+    return data
+
+def encode_source(source, from_time, to_time, multiple_sources=False):
+    images = get_images(
+        from_time=from_time, to_time=to_time, source=source
+    )
+    if source is None:
+        images = images.filter(source__isnull=True)
+    
+    slug = source_slug(source)
+    n_images = images.count()
+    if n_images < 100:
+        return f"Not enough images for {slug}: {n_images}"
+    
+    # frames are read and annotated on VIDEO_WORKERS threads and encoded in order as they come,
+    # images on disk are decoded at the smallest JPEG scale that covers VIDEO_TARGET_WIDTH
+    frames = iter_frames(
+        iter_images(images), 
+        legend_text=lambda image: timestamp_legend(image.timestamp),
+        target_width=VIDEO_TARGET_WIDTH,
+    )
+    
+    suffix = f"_{slug}" if multiple_sources else ""
+    video_name = f"gml_tor06{suffix}_{from_time.strftime('%Y-%m-%d_%H-%M-%S')}_{to_time.strftime('%Y-%m-%d_%H-%M-%S')}.mp4"
+    video_model, video_file = create_video_model(video_name, from_time, to_time)
+    metadata = gen_video(
+        frames=frames,
+        video_path=f"{settings.MEDIA_ROOT}/{video_file}",
+        framerate=VIDEO_FRAMERATE,
+        width=VIDEO_TARGET_WIDTH or None,
+        keyframe_seconds=VIDEO_HLS_SEGMENT_SECONDS if VIDEO_HLS else None,
+    )
+    if metadata is None:
+        raise ValueError(f"Failed to encode {video_name}")
+    
+    save_video_model(video_model, video_file, metadata)
+    return f"{video_name}: {n_images} images"
+
+def concat_run(slug, segments, from_time, to_time, multiple_sources=False, part=None):
+    n_frames = sum(segment.frames for segment in segments)
+    suffix = f"_{slug}" if multiple_sources else ""
+    part_suffix = f"_{part}" if part is not None else ""
+    video_name = f"gml_tor06{suffix}_{from_time.strftime('%Y-%m-%d_%H-%M-%S')}_{to_time.strftime('%Y-%m-%d_%H-%M-%S')}{part_suffix}.mp4"
+    video_model, video_file = create_video_model(video_name, from_time, to_time)
+    video_path = f"{settings.MEDIA_ROOT}/{video_file}"
+    if not concat_videos(
+        paths=[segment.path for segment in segments], 
+        video_path=video_path,
+        list_path=f"{video_path}.txt",
+    ):
+        raise ValueError(f"Failed to concatenate segments of {slug}")
+    
+    os.remove(f"{video_path}.txt")
+    metadata = video_metadata(
+        video_path, 
+        frame_count=n_frames, 
+        width=segments[0].width, 
+        height=segments[0].height, 
+        framerate=VIDEO_FRAMERATE,
+    )
+    save_video_model(video_model, video_file, metadata)
+    return f"{video_name}: {len(segments)} segments, {n_frames} frames"
+
+def concat_window(from_time, to_time):
+    if not wait_for_segments(from_time, to_time):
+        logging.warning(f"Segments between {from_time} and {to_time} are still being encoded, they are left out")
+    
+    results = []
+    segments_per_source = list_segments(from_time, to_time)
+    for slug, segments in segments_per_source.items():
+        n_frames = sum(segment.frames for segment in segments)
+        if n_frames < 100:
+            results.append(f"Not enough frames for {slug}: {n_frames}")
+            continue
         
-        video_model.video_size = os.stat(f"{settings.MEDIA_ROOT}/{video_file}").st_size
-        h, m, s = get_video_length(path=f"{settings.MEDIA_ROOT}/{video_file}")
-        video_model.duration = timedelta(hours=h, minutes=m, seconds=s)
-        video_model.video_file = video_file
-        video_model.save()
-        
-        data = {
-            "action": "done",
-            "time": datetime.now().strftime("%Y-%m-%d %H-%M-%S")
-        }
+        # segments of different frame sizes cannot be concatenated without re-encoding, one video per size run
+        runs = split_by_size(segments)
+        for part, run in enumerate(runs):
+            if len(runs) == 1:
+                results.append(concat_run(slug, run, from_time, to_time, multiple_sources=len(segments_per_source) > 1))
+            else:
+                results.append(concat_run(
+                    slug, run, run[0].start_time, run[-1].end_time, multiple_sources=len(segments_per_source) > 1, part=part,
+                ))
+    
+    data = {
+        "action": "done" if segments_per_source else "ignored",
+        "time": datetime.now().strftime("%Y-%m-%d %H-%M-%S"),
+        "results": results,
+    }
+    
+    return data
+
+@shared_task(bind=True,autoretry_for=(Exception,), retry_backoff=True, retry_kwargs={"max_retries": 5}, ignore_result=True,
+             name='generate_video.tasks.video.core.generate_video')
+def generate_video(self, **kwargs):
+    try:
+        now = datetime.now(tz=timezone.utc)
+        if VIDEO_ENCODER_MODE == "rolling":
+            # segments are already encoded while frames arrive, only concatenate them
+            to_time = datetime.fromtimestamp(
+                int(now.timestamp()) // VIDEO_SEGMENT_SECONDS * VIDEO_SEGMENT_SECONDS, tz=timezone.utc
+            )
+            return concat_window(from_time=to_time - timedelta(minutes=5), to_time=to_time)
         
-        return data
+        return encode_window(from_time=now - timedelta(minutes=5), to_time=now)
+    
     except Exception as err:
-        raise ValueError(f"Error generating video: {err}")
\ No newline at end of file
+        raise ValueError(f"Error generating video: {err}")
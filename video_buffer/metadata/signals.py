@@ -0,0 +1,37 @@
+import os
+import time
+import logging
+from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete
+from .models import Metadata, MetadataColumn, MetadataLocalization, Language
+
+# touched on every metadata change, processes caching metadata (the data API) compare its modification time
+METADATA_VERSION_FILE = os.getenv("METADATA_VERSION_FILE", "/dev/shm/video_buffer_metadata_version")
+
+
+def metadata_version():
+    """Version of the metadata, changes whenever a metadata model is saved or deleted. 0 if never changed."""
+    try:
+        return os.stat(METADATA_VERSION_FILE).st_mtime_ns
+    except OSError:
+        return 0
+
+
+def bump_version():
+    try:
+        with open(METADATA_VERSION_FILE, "w") as f:
+            f.write(str(time.time_ns()))
+    except OSError as err:
+        logging.error(f"Error updating metadata version file {METADATA_VERSION_FILE}: {err}")
+
+
+@receiver(post_save, sender=Metadata)
+@receiver(post_save, sender=MetadataColumn)
+@receiver(post_save, sender=MetadataLocalization)
+@receiver(post_save, sender=Language)
+@receiver(post_delete, sender=Metadata)
+@receiver(post_delete, sender=MetadataColumn)
+@receiver(post_delete, sender=MetadataLocalization)
+@receiver(post_delete, sender=Language)
+def metadata_changed(sender, **kwargs):
+    bump_version()